@@ -24,7 +24,7 @@ class App extends Component {
       };
       axios.post(`${process.env.REACT_APP_USERS_SERVICE_URL}/users`, data)
       .then((res)=>{
-        this.getUsers();
+        this.getChanges();
         this.setState({username: '', email: ''});
       })
       .catch((err) => {console.log(err); });
@@ -40,11 +40,35 @@ class App extends Component {
   
   // nuevo
   getUsers() {
-    axios.get(`${process.env.REACT_APP_USERS_SERVICE_URL}/users`)
+    // el cursor se pide antes de la lista: los cambios posteriores llegan
+    // por /users/changes
+    axios.get(`${process.env.REACT_APP_USERS_SERVICE_URL}/users/changes`)
+    .then((res) => {
+      this.cursor = res.data.data.cursor;
+      return axios.get(`${process.env.REACT_APP_USERS_SERVICE_URL}/users`);
+    })
     .then((res) => {this.setState({users:res.data.data.users});})
     .catch((err) => {console.log(err); });
   }
 
+  getChanges() {
+    axios.get(`${process.env.REACT_APP_USERS_SERVICE_URL}/users/changes?since=${this.cursor}`)
+    .then((res) => {
+      const changed = new Map(res.data.data.users.map((user) => [user.id, user]));
+      const users = this.state.users.map((user) => {
+        const current = changed.get(user.id) || user;
+        changed.delete(user.id);
+        return current;
+      });
+      this.cursor = res.data.data.cursor;
+      this.setState({users: users.concat(Array.from(changed.values()))});
+    })
+    .catch((err) => {
+      console.log(err);
+      this.getUsers();
+    });
+  }
+
   render() {
     return (
       <section className="section">
@@ -0,0 +1,50 @@
+# services/users/benchmarks/bench_hashing.py
+"""Rendimiento de POST /users según el tamaño del pool de hashing
+
+    python -m benchmarks.bench_hashing --requests 200 --concurrency 8 \
+        --pool-sizes 0 1 2 4
+"""
+
+
+import argparse
+import json
+import os
+
+from benchmarks.common import drop_database, make_app, run_load
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument(
+        '--pool-sizes', type=int, nargs='+',
+        default=sorted({0, 1, 2, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    from project import hasher
+
+    for pool_size in args.pool_sizes:
+        app = make_app(
+            BCRYPT_LOG_ROUNDS=args.rounds, BCRYPT_POOL_SIZE=pool_size,
+            BCRYPT_POOL_QUEUE_SIZE=args.concurrency, BCRYPT_POOL_TIMEOUT=60)
+
+        def create_user(client, n):
+            return client.post('/users', content_type='application/json',
+                               data=json.dumps({
+                                   'username': f'bench{n}',
+                                   'email': f'bench{n}@example.com',
+                                   'password': 'greaterthaneight'}))
+
+        try:
+            result = run_load(app, create_user, args.requests,
+                              args.concurrency)
+        finally:
+            hasher.shutdown()
+            drop_database(app)
+        print(json.dumps(dict(pool_size=pool_size, **result)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# services/users/benchmarks/bench_serialization.py
+"""Serialización de la lista de usuarios: ORM + jsonify frente a filas planas
+
+    python -m benchmarks.bench_serialization --rows 10000 100000
+"""
+
+
+import argparse
+import json
+import time
+from unittest import mock
+
+from benchmarks.common import drop_database, make_app, seed_users
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from flask import jsonify
+    from project import db
+    from project.api import serializers
+    from project.api.models import User, user_json, user_rows
+
+    def orm_path():
+        users = [user.to_json() for user in User.query.all()]
+        jsonify({'status': 'success', 'data': {'users': users}})
+        db.session.remove()
+
+    def lean_path():
+        users = [user_json(row) for row in user_rows()]
+        serializers.json_response(
+            {'status': 'success', 'data': {'users': users}})
+        db.session.remove()
+
+    def lean_stdlib_path():
+        with mock.patch.object(serializers, 'orjson', None):
+            lean_path()
+
+    for rows in args.rows:
+        app = make_app(BCRYPT_LOG_ROUNDS=4)
+        seed_users(app, rows)
+        try:
+            with app.test_request_context():
+                result = {
+                    'rows': rows,
+                    'orjson': serializers.orjson is not None,
+                    'orm_jsonify_s': best_of(orm_path, args.repeat),
+                    'lean_stdlib_s': best_of(lean_stdlib_path, args.repeat),
+                    'lean_fast_s': best_of(lean_path, args.repeat),
+                }
+        finally:
+            drop_database(app)
+        result['speedup'] = round(
+            result['orm_jsonify_s'] / result['lean_fast_s'], 2)
+        print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# services/users/benchmarks/bench_startup.py
+"""Arranque y costo por petición: manage:app (coverage + toolbar) frente a
+wsgi:app
+
+    python -m benchmarks.bench_startup --runs 5 --requests 500
+"""
+
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def child(mode, requests):
+    start = time.perf_counter()
+    if mode == 'manage':
+        # lo que hacía `gunicorn manage:app`: coverage activo desde la
+        # importación y la barra de depuración importada siempre
+        import coverage
+        coverage.coverage(branch=True, include='project/*').start()
+        import flask_debugtoolbar  # noqa: F401
+        import flask.cli  # noqa: F401
+    from project import create_app
+    create_app()
+    startup = time.perf_counter() - start
+
+    from benchmarks.common import drop_database, make_app, seed_users
+    app = make_app(BCRYPT_LOG_ROUNDS=4)
+    seed_users(app, 100)
+    client = app.test_client()
+    timings = {}
+    try:
+        for path in ('/users/ping', '/users', '/users/1'):
+            client.get(path)
+            start = time.perf_counter()
+            for _ in range(requests):
+                client.get(path)
+            timings[path] = round(
+                (time.perf_counter() - start) / requests * 1e6, 1)
+    finally:
+        drop_database(app)
+    print(json.dumps({'startup_s': startup, 'request_us': timings}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--child', choices=('manage', 'wsgi'))
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child, args.requests)
+
+    env = dict(os.environ, APP_SETTINGS='project.config.ProductionConfig')
+    for mode in ('manage', 'wsgi'):
+        runs = [
+            json.loads(subprocess.check_output(
+                [sys.executable, '-m', 'benchmarks.bench_startup',
+                 '--child', mode, '--requests', str(args.requests)],
+                env=env).decode())
+            for _ in range(args.runs)
+        ]
+        print(json.dumps({
+            'entry_point': f'{mode}:app',
+            'startup_s': round(statistics.median(
+                run['startup_s'] for run in runs), 4),
+            'request_us': {
+                path: statistics.median(
+                    run['request_us'][path] for run in runs)
+                for path in runs[0]['request_us']
+            },
+        }))
+
+
+if __name__ == '__main__':
+    main()
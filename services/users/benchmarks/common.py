@@ -0,0 +1,99 @@
+# services/users/benchmarks/common.py
+
+
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def make_app(database_uri=None, **config):
+    """Crea la app sobre una base de datos SQLite temporal (o la indicada)."""
+    os.environ.setdefault('APP_SETTINGS', 'project.config.ProductionConfig')
+    from project import create_app, db
+
+    if database_uri is None:
+        handle, path = tempfile.mkstemp(prefix='users-bench-', suffix='.db')
+        os.close(handle)
+        database_uri = f'sqlite:///{path}'
+    app = create_app()
+    # el control de admisión rechazaría casi toda la carga del benchmark
+    config = dict({'USERS_WRITE_RATE': 0, 'USERS_WRITE_MAX_INFLIGHT': 0},
+                  **config)
+    app.config.update(SQLALCHEMY_DATABASE_URI=database_uri, **config)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def drop_database(app):
+    from project import db
+
+    with app.app_context():
+        db.drop_all()
+        db.get_engine(app).dispose()
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite:///') and 'users-bench-' in uri:
+        os.remove(uri[len('sqlite:///'):])
+
+
+def seed_users(app, count, chunk_size=10000):
+    """Inserta `count` usuarios sintéticos con un único hash precalculado."""
+    from project.api.seed import seed_users as seed
+
+    with app.app_context():
+        seed(count, chunk_size, precomputed_hash=True)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_load(app, make_request, requests, concurrency):
+    """Ejecuta `requests` llamadas a `make_request(client, n)` repartidas en
+    `concurrency` hilos, cada uno con su propio cliente de prueba.
+
+    Devuelve un resumen con latencias en milisegundos y peticiones por
+    segundo; ambas cuentan solo las respuestas sin error.
+    """
+    local = threading.local()
+    counter = iter(range(requests))
+    counter_lock = threading.Lock()
+    latencies = []
+    errors = []
+
+    def worker():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        while True:
+            with counter_lock:
+                n = next(counter, None)
+            if n is None:
+                return
+            start = time.perf_counter()
+            response = make_request(local.client, n)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            else:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': len(errors),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+    }
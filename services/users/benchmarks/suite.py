@@ -0,0 +1,78 @@
+# services/users/benchmarks/suite.py
+"""Suite de carga reproducible para los endpoints del servicio users"""
+
+
+import json
+import random
+import subprocess
+
+from benchmarks.common import drop_database, make_app, run_load, seed_users
+
+
+def _list_users(client, n):
+    return client.get('/users')
+
+
+def _index(client, n):
+    return client.get('/')
+
+
+def _single_user(users):
+    rng = random.Random(users)
+    ids = [rng.randint(1, users) for _ in range(1024)]
+    # seed_users numera los ids desde 1 en una base vacía
+
+    def request(client, n):
+        return client.get(f'/users/{ids[n % len(ids)]}')
+    return request
+
+
+def _create_user(prefix):
+    def request(client, n):
+        return client.post('/users', content_type='application/json',
+                           data=json.dumps({
+                               'username': f'{prefix}{n}',
+                               'email': f'{prefix}{n}@example.com',
+                               'password': 'greaterthaneight'}))
+    return request
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(users=1000, concurrency=(1, 4, 16), requests=200,
+              database_uri=None, **config):
+    """Siembra `users` usuarios en una base descartable y mide cada
+    escenario con cada nivel de concurrencia.
+
+    Las tablas se crean al inicio y se eliminan al final, por eso
+    `database_uri` debe apuntar a una base de datos de pruebas.
+    """
+    app = make_app(database_uri, **config)
+    try:
+        seed_users(app, users)
+        scenarios = [
+            ('GET /users', lambda level: _list_users),
+            ('GET /users/<id>', lambda level: _single_user(users)),
+            ('POST /users', lambda level: _create_user(f'bench{level}x')),
+            ('GET /', lambda level: _index),
+        ]
+        results = []
+        for name, make_request in scenarios:
+            for level in concurrency:
+                result = run_load(app, make_request(level), requests, level)
+                results.append(dict(scenario=name, **result))
+    finally:
+        drop_database(app)
+    return {
+        'revision': git_revision(),
+        'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0],
+        'users': users,
+        'results': results,
+    }
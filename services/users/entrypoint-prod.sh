@@ -8,4 +8,4 @@ done
 
 echo "PostgreSQL iniciado"
 
-gunicorn -b 0.0.0.0:5000 manage:app
+gunicorn -c gunicorn.conf.py wsgi:app
@@ -0,0 +1,46 @@
+# services/users/gunicorn.conf.py
+"""Configuración de gunicorn a partir de la clase de APP_SETTINGS
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Cada valor GUNICORN_* de project/config.py puede sobrescribirse con la
+variable de entorno del mismo nombre.
+"""
+
+import os
+
+from werkzeug.utils import import_string
+
+from project.config import available_cpus
+
+app_config = import_string(
+    os.environ.get('APP_SETTINGS', 'project.config.ProductionConfig'))
+cpus = available_cpus()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = app_config.GUNICORN_WORKERS or 2 * cpus + 1
+# sync: CPU y hashing; gthread o gevent: lecturas que esperan a la base
+worker_class = app_config.GUNICORN_WORKER_CLASS
+threads = app_config.GUNICORN_THREADS
+# con preload los workers comparten el código importado (copy-on-write);
+# gevent debe parchear la librería estándar antes de importar la app
+preload_app = app_config.GUNICORN_PRELOAD and worker_class != 'gevent'
+max_requests = app_config.GUNICORN_MAX_REQUESTS
+max_requests_jitter = app_config.GUNICORN_MAX_REQUESTS_JITTER
+timeout = app_config.GUNICORN_TIMEOUT
+accesslog = '-'
+
+
+def post_worker_init(worker):
+    """Cada worker abre sus propias conexiones: las heredadas del master
+    no pueden compartirse entre procesos.
+
+    Corre después de `init_process`, cuando gevent ya parcheó la librería
+    estándar y el worker cargó la app (post_fork corre antes). El pool de
+    hashing no se reparte entre workers: cada uno usa `BCRYPT_POOL_SIZE`
+    (por defecto todos los CPUs) para que un lote ocupe todos los núcleos;
+    el pool se crea recién con el primer hash."""
+    from project import db
+
+    with worker.wsgi.app_context():
+        db.get_engine().dispose()
@@ -1,17 +1,25 @@
 # services/users/manage.py
 
+import json
+import sys
 import unittest
-import coverage
 
-COV = coverage.coverage(
-    branch=True,
-    include='project/*',
-    omit=[
-        'project/tests/*',
-        'project/config.py',
-    ]
-)
-COV.start()
+import click
+
+COV = None
+if sys.argv[1:2] == ['cov']:
+    # el trazado de coverage solo se activa para `python manage.py cov`
+    import coverage
+
+    COV = coverage.coverage(
+        branch=True,
+        include='project/*',
+        omit=[
+            'project/tests/*',
+            'project/config.py',
+        ]
+    )
+    COV.start()
 
 
 from flask.cli import FlaskGroup
@@ -33,8 +41,13 @@ def recreate_db():
 
 
 @cli.command()
-def test():
+@click.option('--workers', default=1,
+              help='Procesos en paralelo, cada uno con su base de datos.')
+def test(workers):
     """Ejecutando los test sin cobertura de código"""
+    if workers > 1:
+        from project.tests.parallel import run_parallel
+        return run_parallel('project/tests', 'test*.py', workers)
     tests = unittest.TestLoader().discover('project/tests', pattern='test*.py')
     result = unittest.TextTestRunner(verbosity=2).run(tests)
     if result.wasSuccessful():
@@ -42,12 +55,91 @@ def test():
     return 1
 
 @cli.command('seed_db')
-def seed_db():
+@click.option('--count', default=0,
+              help='Cantidad de usuarios sintéticos a generar.')
+@click.option('--chunk-size', default=10000, help='Usuarios por lote.')
+@click.option('--fast-hash', is_flag=True,
+              help='Reutiliza un único hash precalculado.')
+def seed_db(count, chunk_size, fast_hash):
     """Seeds the database."""
+    if count:
+        from project.api.seed import seed_users
+
+        def progress(done, total):
+            click.echo(f'{done}/{total} usuarios insertados')
+        seed_users(count, chunk_size, fast_hash, progress)
+        return
     db.session.add(User(username='raquel', email="raquel@gmail.com", password='greaterthaneight'))
     db.session.add(User(username='sindy', email="sindyepiquien@upeu.edu.pe", password='greaterthaneight'))
     db.session.commit()
 
+@cli.command()
+@click.option('--users', default=1000, help='Usuarios sembrados.')
+@click.option('--concurrency', default='1,4,16',
+              help='Niveles de concurrencia separados por comas.')
+@click.option('--requests', default=200, help='Peticiones por escenario.')
+@click.option('--database-url', default=None,
+              help='Base descartable; por defecto un SQLite temporal.')
+@click.option('--bcrypt-rounds', default=None, type=int)
+@click.option('--output', type=click.File('w'), default='-')
+def bench(users, concurrency, requests, database_url, bcrypt_rounds,
+          output):
+    """Mide latencias p50/p95/p99 y peticiones por segundo."""
+    from benchmarks.suite import run_suite
+
+    config = {}
+    if bcrypt_rounds is not None:
+        config['BCRYPT_LOG_ROUNDS'] = bcrypt_rounds
+    report = run_suite(
+        users=users,
+        concurrency=[int(level) for level in concurrency.split(',')],
+        requests=requests, database_uri=database_url, **config)
+    json.dump(report, output, indent=2)
+    output.write('\n')
+
+
+@cli.command('rebuild_stats')
+def rebuild_stats():
+    """Recalcula los contadores de usuarios desde la tabla users."""
+    from project.api.models import rebuild_user_stats
+
+    total, active = rebuild_user_stats()
+    click.echo(f'{total} usuarios, {active} activos')
+
+
+@cli.command('prune_changes')
+@click.option('--days', default=None, type=int,
+              help='Días de cambios a conservar.')
+def prune_changes(days):
+    """Borra los cambios de usuarios más antiguos del feed."""
+    from datetime import datetime, timedelta
+
+    from flask import current_app
+
+    from project.api.models import prune_user_changes
+
+    if days is None:
+        days = current_app.config['USERS_CHANGES_RETENTION_DAYS']
+    deleted = prune_user_changes(datetime.utcnow() - timedelta(days))
+    click.echo(f'{deleted} cambios borrados')
+
+
+@cli.command('check_indexes')
+def check_indexes():
+    """Informa los índices que faltan o no se usan en la base de datos."""
+    from project.database import index_report
+
+    missing, unused = index_report(db.engine, db.metadata)
+    for table, index in missing:
+        click.echo(f'falta: {table}.{index}')
+    if unused is None:
+        click.echo('uso de índices: solo disponible en PostgreSQL')
+    for table, index, size in unused or ():
+        click.echo(f'sin uso: {table}.{index} ({size} bytes)')
+    if missing:
+        sys.exit(1)
+
+
 @cli.command()
 def cov():
     """Ejecuta las pruebas unitarias con coverage."""
@@ -0,0 +1,30 @@
+"""collection versions
+
+Revision ID: 3d1f0c8a9b27
+Revises: 8fa5854a7115
+Create Date: 2026-10-18 09:12:41.208311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d1f0c8a9b27'
+down_revision = '8fa5854a7115'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    collection_versions = op.create_table(
+        'collection_versions',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(collection_versions, [{'name': 'users', 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('collection_versions')
@@ -0,0 +1,36 @@
+"""user changes feed
+
+Revision ID: 9b4e27d1c3a5
+Revises: c52e7a4d18f6
+Create Date: 2026-10-18 11:04:17.532904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4e27d1c3a5'
+down_revision = 'c52e7a4d18f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user_changes',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'),
+                  nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('changed_date', sa.DateTime(),
+                  server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_changes_changed_date'), 'user_changes',
+                    ['changed_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_user_changes_changed_date'),
+                  table_name='user_changes')
+    op.drop_table('user_changes')
@@ -0,0 +1,93 @@
+"""users search indexes
+
+Revision ID: c52e7a4d18f6
+Revises: 3d1f0c8a9b27
+Create Date: 2026-10-18 11:40:03.517920
+
+"""
+from contextlib import contextmanager
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e7a4d18f6'
+down_revision = '3d1f0c8a9b27'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('username', 'email')
+
+
+@contextmanager
+def autocommit_block():
+    """Sale de la transacción de la migración (CONCURRENTLY no corre en
+    una); usa `autocommit_block` de Alembic 1.2+ si existe."""
+    context = op.get_context()
+    if hasattr(context, 'autocommit_block'):
+        with context.autocommit_block():
+            yield
+        return
+    op.execute('COMMIT')
+    try:
+        yield
+    finally:
+        op.execute('BEGIN')
+
+
+def index_valid(name):
+    """True si el índice existe y es válido, False si quedó inválido y
+    None si no existe (siempre None al generar SQL con --sql)."""
+    if op.get_context().as_sql:
+        return None
+    row = op.get_bind().execute(sa.text(
+        'SELECT i.indisvalid FROM pg_index i '
+        'JOIN pg_class c ON c.oid = i.indexrelid '
+        'WHERE c.relname = :name AND pg_table_is_visible(c.oid)'),
+        name=name).first()
+    return None if row is None else row[0]
+
+
+def create_index_concurrently(name, columns, **kw):
+    valid = index_valid(name)
+    if valid:
+        return
+    if valid is False:
+        # restos de un CONCURRENTLY fallido
+        op.execute(f'DROP INDEX CONCURRENTLY {name}')
+    op.create_index(
+        name, 'users', columns, postgresql_concurrently=True, **kw)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # prefijos con text_pattern_ops y subcadenas con trigramas; sin
+        # bloquear las escrituras en users mientras se construyen
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        with autocommit_block():
+            for column in COLUMNS:
+                create_index_concurrently(
+                    f'ix_users_{column}_lower_pattern',
+                    [sa.text(f'lower({column}) text_pattern_ops')])
+                create_index_concurrently(
+                    f'ix_users_{column}_lower_trgm',
+                    [sa.text(f'lower({column}) gin_trgm_ops')],
+                    postgresql_using='gin')
+    else:
+        for column in COLUMNS:
+            op.create_index(
+                f'ix_users_{column}_lower', 'users',
+                [sa.text(f'lower({column})')])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with autocommit_block():
+            for column in COLUMNS:
+                for suffix in ('trgm', 'pattern'):
+                    op.execute('DROP INDEX CONCURRENTLY IF EXISTS '
+                               f'ix_users_{column}_lower_{suffix}')
+    else:
+        for column in COLUMNS:
+            op.drop_index(f'ix_users_{column}_lower', 'users')
@@ -0,0 +1,47 @@
+"""user stats counters
+
+Revision ID: e8a3f5b2d617
+Revises: 9b4e27d1c3a5
+Create Date: 2026-10-18 13:27:05.118462
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a3f5b2d617'
+down_revision = '9b4e27d1c3a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user_counters',
+        sa.Column('name', sa.String(length=32), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table(
+        'user_signups',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('signups', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('day')
+    )
+    # los contadores parten del contenido actual de users
+    op.execute(
+        "INSERT INTO user_counters (name, value) "
+        "SELECT 'total', count(*) FROM users")
+    op.execute(
+        "INSERT INTO user_counters (name, value) "
+        "SELECT 'active', count(*) FROM users WHERE active")
+    op.execute(
+        "INSERT INTO user_signups (day, signups) "
+        "SELECT date(created_date), count(*) FROM users "
+        "GROUP BY date(created_date)")
+
+
+def downgrade():
+    op.drop_table('user_signups')
+    op.drop_table('user_counters')
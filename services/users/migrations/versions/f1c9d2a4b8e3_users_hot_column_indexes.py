@@ -0,0 +1,81 @@
+"""users created_date and active indexes
+
+Revision ID: f1c9d2a4b8e3
+Revises: e8a3f5b2d617
+Create Date: 2026-10-18 15:02:48.736120
+
+"""
+from contextlib import contextmanager
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c9d2a4b8e3'
+down_revision = 'e8a3f5b2d617'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_users_created_date', ['created_date']),
+    ('ix_users_active_id', ['active', 'id']),
+)
+
+
+@contextmanager
+def autocommit_block():
+    """Sale de la transacción de la migración (CONCURRENTLY no corre en
+    una); usa `autocommit_block` de Alembic 1.2+ si existe."""
+    context = op.get_context()
+    if hasattr(context, 'autocommit_block'):
+        with context.autocommit_block():
+            yield
+        return
+    op.execute('COMMIT')
+    try:
+        yield
+    finally:
+        op.execute('BEGIN')
+
+
+def index_valid(name):
+    """True si el índice existe y es válido, False si quedó inválido y
+    None si no existe (siempre None al generar SQL con --sql)."""
+    if op.get_context().as_sql:
+        return None
+    row = op.get_bind().execute(sa.text(
+        'SELECT i.indisvalid FROM pg_index i '
+        'JOIN pg_class c ON c.oid = i.indexrelid '
+        'WHERE c.relname = :name AND pg_table_is_visible(c.oid)'),
+        name=name).first()
+    return None if row is None else row[0]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # SQLite bloquea la base entera de todos modos
+        for name, columns in INDEXES:
+            op.create_index(name, 'users', columns)
+        return
+    with autocommit_block():
+        for name, columns in INDEXES:
+            valid = index_valid(name)
+            if valid:
+                # p. ej. una base creada con create_all()
+                continue
+            if valid is False:
+                # restos de un CONCURRENTLY fallido
+                op.execute(f'DROP INDEX CONCURRENTLY {name}')
+            op.create_index(
+                name, 'users', columns, postgresql_concurrently=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, _ in INDEXES:
+            op.drop_index(name, 'users')
+        return
+    with autocommit_block():
+        for name, _ in INDEXES:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
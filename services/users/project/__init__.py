@@ -1,17 +1,27 @@
 # services/users/project/__init__.py
 import os
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_debugtoolbar import DebugToolbarExtension
 from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from project.database import SQLAlchemy
+from project.api.admission import Admission
+from project.api.cache import UserCache
+from project.api.compression import Compression
+from project.api.hashing import PasswordHasher
+from project.api.metrics import Metrics
 # instanciado la db
 db = SQLAlchemy()
-toolbar = DebugToolbarExtension()
 cors = CORS()
 migrate = Migrate()
 bcrypt = Bcrypt()
+hasher = PasswordHasher()
+user_cache = UserCache()
+metrics = Metrics(blueprints=('users',))
+admission = Admission()
+compression = Compression()
 
 
 def create_app(script_info=None):
@@ -21,12 +31,27 @@ def create_app(script_info=None):
     # estableciendo configuración
     app_settings = os.getenv('APP_SETTINGS')
     app.config.from_object(app_settings)
+    # detrás de nginx remote_addr es el proxy: el control de admisión
+    # necesita la dirección del cliente
+    if app.config.get('PROXY_FIX_X_FOR'):
+        app.wsgi_app = ProxyFix(
+            app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
     # configurando extensiones
     db.init_app(app)
-    toolbar.init_app(app)
+    # los after_request corren en orden inverso: la compresión se registra
+    # primero para ver el cuerpo final (p. ej. con la barra de depuración)
+    compression.init_app(app)
+    if app.config.get('DEBUG_TB_ENABLED'):
+        # solo en desarrollo: producción no importa la barra de depuración
+        from flask_debugtoolbar import DebugToolbarExtension
+        DebugToolbarExtension(app)
     cors.init_app(app)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
+    hasher.init_app(app)
+    user_cache.init_app(app)
+    metrics.init_app(app)
+    admission.init_app(app)
     # register blueprints
     from project.api.users import users_blueprint
     app.register_blueprint(users_blueprint)
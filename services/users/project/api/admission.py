@@ -0,0 +1,174 @@
+# services/users/project/api/admission.py
+
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class TokenBucket:
+    """Cubeta de tokens: `rate` tokens por segundo hasta `burst`"""
+
+    def __init__(self, burst):
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, rate, burst):
+        """Consume un token; devuelve los segundos a esperar si no hay."""
+        now = time.monotonic()
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / rate
+
+
+class _AdmissionState:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+        self.inflight = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.waiters = 0
+        self.waits_refused = 0
+
+
+class Admission:
+    """Control de admisión para las escrituras costosas (bcrypt)
+
+    Cada worker acepta como máximo `USERS_WRITE_MAX_INFLIGHT` escrituras a
+    la vez y cada cliente dispone de una cubeta de `USERS_WRITE_BURST`
+    tokens que se recarga a `USERS_WRITE_RATE` por segundo. Lo que excede
+    se rechaza enseguida con 503 o 429 y `Retry-After`, así los hilos
+    quedan libres para las lecturas. Un límite en 0 lo desactiva.
+
+    Las esperas de long-poll también retienen un hilo: como máximo
+    `USERS_CHANGES_MAX_WAITERS` a la vez por worker (0: ninguna).
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('USERS_WRITE_MAX_INFLIGHT', 0)
+        app.config.setdefault('USERS_WRITE_RATE', 0)
+        app.config.setdefault('USERS_WRITE_BURST', 10)
+        app.config.setdefault('USERS_WRITE_MAX_CLIENTS', 10000)
+        app.config.setdefault('USERS_CHANGES_MAX_WAITERS', 0)
+        app.extensions['admission'] = _AdmissionState()
+
+    @property
+    def _state(self):
+        return current_app.extensions['admission']
+
+    def _retry_after(self, config):
+        """Segundos de espera del cliente, 0 si puede escribir ahora."""
+        rate = config['USERS_WRITE_RATE']
+        if rate <= 0:
+            return 0
+        state = self._state
+        client = request.remote_addr
+        with state.lock:
+            bucket = state.buckets.get(client)
+            if bucket is None:
+                bucket = state.buckets[client] = TokenBucket(
+                    config['USERS_WRITE_BURST'])
+                while len(state.buckets) > config['USERS_WRITE_MAX_CLIENTS']:
+                    state.buckets.popitem(last=False)
+            state.buckets.move_to_end(client)
+            wait = bucket.take(rate, config['USERS_WRITE_BURST'])
+            if wait:
+                state.throttled += 1
+            return wait
+
+    def _acquire(self, config):
+        limit = config['USERS_WRITE_MAX_INFLIGHT']
+        state = self._state
+        with state.lock:
+            if 0 < limit <= state.inflight:
+                state.rejected += 1
+                return False
+            state.inflight += 1
+            return True
+
+    def _release(self):
+        state = self._state
+        with state.lock:
+            state.inflight -= 1
+
+    def limit_writes(self, view):
+        """Decorador que aplica el control de admisión a las escrituras."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method in SAFE_METHODS:
+                return view(*args, **kwargs)
+            config = current_app.config
+            wait = self._retry_after(config)
+            if wait:
+                return _reject(
+                    429, 'Demasiadas solicitudes, intente más tarde.', wait)
+            if not self._acquire(config):
+                return _reject(
+                    503, 'Servicio ocupado, intente más tarde.', 1)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                self._release()
+        return wrapper
+
+    @contextmanager
+    def long_poll(self):
+        """Reserva un lugar para esperar; entrega False si no queda."""
+        limit = current_app.config['USERS_CHANGES_MAX_WAITERS']
+        state = self._state
+        with state.lock:
+            allowed = state.waiters < limit
+            if allowed:
+                state.waiters += 1
+            else:
+                state.waits_refused += 1
+        try:
+            yield allowed
+        finally:
+            if allowed:
+                with state.lock:
+                    state.waiters -= 1
+
+    def reset(self):
+        state = self._state
+        with state.lock:
+            state.buckets.clear()
+            state.inflight = state.rejected = state.throttled = 0
+            state.waiters = state.waits_refused = 0
+
+    def stats(self):
+        state = self._state
+        return {
+            'inflight': state.inflight,
+            'clients': len(state.buckets),
+            'rejected': state.rejected,
+            'throttled': state.throttled,
+            'waiters': state.waiters,
+            'waits_refused': state.waits_refused,
+        }
+
+
+def _reject(status, message, retry_after):
+    response_object = {
+        'status': 'falló',
+        'message': message
+    }
+    return jsonify(response_object), status, {
+        'Retry-After': str(math.ceil(retry_after))}
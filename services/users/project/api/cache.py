@@ -0,0 +1,176 @@
+# services/users/project/api/cache.py
+
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from werkzeug.utils import import_string
+
+
+class CacheBackend:
+    """Interfaz de los backends de caché
+
+    Un backend compartido (p. ej. Redis) solo necesita implementar estos
+    métodos y `from_config`, y configurarse en `USERS_CACHE_BACKEND`.
+    """
+
+    @classmethod
+    def from_config(cls, config):
+        return cls()
+
+    def get(self, key):
+        """Devuelve el valor guardado o `None` si no existe o expiró."""
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete_many(self, keys):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        return 0
+
+
+class NullCache(CacheBackend):
+    """Backend que no guarda nada (caché desactivada)."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete_many(self, keys):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """Caché en el proceso con expulsión LRU y expiración por TTL."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config['USERS_CACHE_SIZE'], config['USERS_CACHE_TTL'])
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _CacheState:
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+
+class UserCache:
+    """Caché de lectura de usuarios individuales
+
+    Los valores se cargan con `get_or_load` en un fallo y se invalidan
+    tras cada commit que escriba usuarios (ver `project.api.models`). Con
+    el backend en memoria cada proceso tiene su propia copia, así que cada
+    valor se guarda con la versión de `users` con la que se cargó: si se
+    pide una versión más nueva (escrita por otro worker) es un fallo.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault(
+            'USERS_CACHE_BACKEND', 'project.api.cache.MemoryCache')
+        app.config.setdefault('USERS_CACHE_SIZE', 1024)
+        app.config.setdefault('USERS_CACHE_TTL', 60)
+        backend = app.config['USERS_CACHE_BACKEND']
+        if isinstance(backend, str):
+            backend = import_string(backend)
+        app.extensions['user_cache'] = _CacheState(
+            backend.from_config(app.config))
+
+    @property
+    def _state(self):
+        return current_app.extensions['user_cache']
+
+    @staticmethod
+    def _key(user_id):
+        return f'user:{user_id}'
+
+    def get_or_load(self, user_id, loader, store=True, version=0):
+        """Devuelve el usuario cacheado o lo carga con `loader(user_id)`
+
+        Un valor cargado con una versión anterior a `version` no sirve.
+        Con `store` en falso el valor cargado no se guarda (p. ej. si viene
+        de una réplica que puede estar atrasada).
+        """
+        state = self._state
+        entry = state.backend.get(self._key(user_id))
+        if entry is not None and entry[0] >= version:
+            state.hits += 1
+            return entry[1]
+        state.misses += 1
+        value = loader(user_id)
+        if value is not None and store:
+            state.backend.set(self._key(user_id), (version, value))
+        return value
+
+    def invalidate(self, user_ids):
+        self._state.backend.delete_many(
+            [self._key(user_id) for user_id in user_ids])
+
+    def clear(self):
+        state = self._state
+        state.backend.clear()
+        state.hits = state.misses = 0
+
+    def stats(self):
+        state = self._state
+        return {
+            'backend': type(state.backend).__name__,
+            'size': len(state.backend),
+            'hits': state.hits,
+            'misses': state.misses,
+        }
@@ -0,0 +1,140 @@
+# services/users/project/api/compression.py
+
+
+import zlib
+
+import brotli
+from flask import current_app, request
+
+from project.api.cache import MemoryCache
+
+
+ENCODINGS = ('br', 'gzip')
+
+
+def etag_variants(etag):
+    """ETags que puede enviar un cliente para el mismo contenido."""
+    return [etag] + [f'{etag}-{encoding}' for encoding in ENCODINGS]
+
+
+class _Compressor:
+    """Interfaz común de gzip y brotli para comprimir por bloques"""
+
+    def __init__(self, encoding, config):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(
+                quality=config['COMPRESS_BROTLI_QUALITY'])
+        else:
+            self._zlib = zlib.compressobj(
+                config['COMPRESS_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def process(self, data):
+        # cada bloque se vacía al cliente para no frenar el streaming
+        if self.encoding == 'br':
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class Compression:
+    """Compresión gzip/brotli negociada con `Accept-Encoding`
+
+    Se comprimen las respuestas 200 de los tipos en `COMPRESS_MIMETYPES`
+    de al menos `COMPRESS_MIN_SIZE` bytes; las respuestas en streaming se
+    comprimen bloque a bloque. Si la respuesta tiene ETag, el cuerpo
+    comprimido se guarda bajo el ETag y la codificación, y el ETag enviado
+    lleva la codificación como sufijo.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+        app.config.setdefault('COMPRESS_MIMETYPES', (
+            'text/html', 'text/plain', 'text/csv', 'application/json',
+            'application/x-ndjson'))
+        app.config.setdefault('COMPRESS_CACHE_SIZE', 256)
+        app.config.setdefault('COMPRESS_CACHE_MAX_BODY', 1024 * 1024)
+        app.extensions['compression_cache'] = MemoryCache(
+            app.config['COMPRESS_CACHE_SIZE'],
+            app.config.get('USERS_CACHE_TTL', 60))
+        app.after_request(self._after_request)
+
+    @staticmethod
+    def _encoding():
+        return request.accept_encodings.best_match(ENCODINGS)
+
+    def _after_request(self, response):
+        config = current_app.config
+        if not config['COMPRESS_ENABLED'] or response.status_code != 200 \
+                or response.direct_passthrough \
+                or 'Content-Encoding' in response.headers \
+                or response.mimetype not in config['COMPRESS_MIMETYPES']:
+            return response
+        response.vary.add('Accept-Encoding')
+        if not response.is_streamed and \
+                len(response.get_data()) < config['COMPRESS_MIN_SIZE']:
+            return response
+        encoding = self._encoding()
+        if encoding is None:
+            return response
+        etag, _ = response.get_etag()
+        cache = current_app.extensions['compression_cache']
+        key = f'{encoding}:{etag}'
+        body = cache.get(key) if etag else None
+        if body is not None:
+            # el cuerpo original no se consume (ni se renderiza)
+            response.close()
+            response.set_data(body)
+        elif response.is_streamed:
+            response.response = self._stream(
+                response.response, _Compressor(encoding, config),
+                cache if etag else None, key,
+                config['COMPRESS_CACHE_MAX_BODY'])
+            response.headers.pop('Content-Length', None)
+        else:
+            compressor = _Compressor(encoding, config)
+            body = compressor.process(response.get_data()) + \
+                compressor.finish()
+            response.set_data(body)
+            if etag and len(body) <= config['COMPRESS_CACHE_MAX_BODY']:
+                cache.set(key, body)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            response.set_etag(f'{etag}-{encoding}')
+        return response
+
+    @staticmethod
+    def _stream(chunks, compressor, cache, key, max_body):
+        # el cuerpo comprimido se guarda solo si no supera `max_body`
+        parts = [] if cache is not None else None
+        size = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                data = compressor.process(chunk)
+                size += len(data)
+                if parts is not None and size > max_body:
+                    parts = None
+                elif parts is not None:
+                    parts.append(data)
+                yield data
+            data = compressor.finish()
+            yield data
+            if parts is not None and size + len(data) <= max_body:
+                cache.set(key, b''.join(parts) + data)
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
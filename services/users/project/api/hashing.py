@@ -0,0 +1,109 @@
+# services/users/project/api/hashing.py
+
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+from flask import current_app
+
+
+class HashingQueueFull(Exception):
+    """No hay lugar en la cola del pool de hashing."""
+
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(
+        password.encode('utf-8'), bcrypt.gensalt(rounds)).decode()
+
+
+def _hash_passwords(passwords, rounds):
+    return [_hash_password(password, rounds) for password in passwords]
+
+
+class PasswordHasher:
+    """Servicio de hashing bcrypt sobre un pool de procesos acotado
+
+    Con `BCRYPT_POOL_SIZE` en 0 los hashes se calculan en el hilo de la
+    petición. Con un pool, cada tarea ocupa un lugar de una cola de
+    `BCRYPT_POOL_SIZE + BCRYPT_POOL_QUEUE_SIZE` lugares; si no se libera
+    uno en `BCRYPT_POOL_TIMEOUT` segundos se lanza `HashingQueueFull`.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._key = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('BCRYPT_LOG_ROUNDS', 12)
+        app.config.setdefault('BCRYPT_POOL_SIZE', 0)
+        app.config.setdefault('BCRYPT_POOL_QUEUE_SIZE', 0)
+        app.config.setdefault('BCRYPT_POOL_TIMEOUT', 5)
+        app.extensions['password_hasher'] = self
+
+    def _get_executor(self, config):
+        size = config['BCRYPT_POOL_SIZE']
+        # el pid forma parte de la clave: un pool heredado de un fork
+        # (p. ej. gunicorn con preload) no sirve en el proceso hijo
+        key = (os.getpid(), size, config['BCRYPT_POOL_QUEUE_SIZE'])
+        with self._lock:
+            if self._key != key:
+                if self._executor is not None and self._key[0] == key[0]:
+                    self._executor.shutdown(wait=False)
+                self._executor = ProcessPoolExecutor(size)
+                self._slots = threading.BoundedSemaphore(
+                    size + config['BCRYPT_POOL_QUEUE_SIZE'])
+                self._key = key
+            return self._executor, self._slots
+
+    def _submit(self, config, fn, *args):
+        executor, slots = self._get_executor(config)
+        if not slots.acquire(timeout=config['BCRYPT_POOL_TIMEOUT']):
+            raise HashingQueueFull()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def hash(self, password):
+        """Devuelve el hash bcrypt de `password` como texto."""
+        if not password:
+            raise ValueError('Password must be non-empty.')
+        config = current_app.config
+        rounds = config['BCRYPT_LOG_ROUNDS']
+        if config['BCRYPT_POOL_SIZE'] < 1:
+            return _hash_password(password, rounds)
+        return self._submit(config, _hash_password, password, rounds).result()
+
+    def hash_many(self, passwords):
+        """Devuelve los hashes de `passwords` repartidos en el pool."""
+        if not all(passwords):
+            raise ValueError('Password must be non-empty.')
+        config = current_app.config
+        rounds = config['BCRYPT_LOG_ROUNDS']
+        size = config['BCRYPT_POOL_SIZE']
+        if size < 1 or not passwords:
+            return _hash_passwords(passwords, rounds)
+        # no más tareas que lugares en la cola, para no esperar por uno
+        chunks = min(size * 4, size + config['BCRYPT_POOL_QUEUE_SIZE'])
+        chunk_size = -(-len(passwords) // chunks)
+        futures = [
+            self._submit(config, _hash_passwords,
+                         passwords[start:start + chunk_size], rounds)
+            for start in range(0, len(passwords), chunk_size)
+        ]
+        return [hashed for future in futures for hashed in future.result()]
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+            self._executor = self._slots = self._key = None
@@ -0,0 +1,192 @@
+# services/users/project/api/metrics.py
+
+
+import threading
+import time
+from collections import defaultdict
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Histograma acumulado con buckets fijos, al estilo Prometheus"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield bound, running
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+class Metrics:
+    """Métricas por endpoint: latencia, estados y SQL por petición
+
+    Solo se miden las vistas de los blueprints indicados. Los contadores
+    viven en cada proceso: con varios workers de gunicorn cada uno expone
+    los suyos.
+    """
+
+    def __init__(self, app=None, blueprints=()):
+        self.blueprints = set(blueprints)
+        self._lock = threading.Lock()
+        self._latency = defaultdict(Histogram)
+        self._statuses = defaultdict(int)
+        self._statements = defaultdict(int)
+        self._db_seconds = defaultdict(float)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        if not app.config['METRICS_ENABLED']:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if not event.contains(
+                Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(
+                Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(
+                Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+        app.extensions['metrics'] = self
+
+    def _before_request(self):
+        if request.blueprint in self.blueprints:
+            g.metrics_start = time.perf_counter()
+            g.metrics_statements = 0
+            g.metrics_db_seconds = 0.0
+
+    def _after_request(self, response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        endpoint, method = request.endpoint, request.method
+        with self._lock:
+            self._latency[endpoint, method].observe(elapsed)
+            self._statuses[endpoint, method, response.status_code] += 1
+            self._statements[endpoint] += g.metrics_statements
+            self._db_seconds[endpoint] += g.metrics_db_seconds
+        return response
+
+    def reset(self):
+        with self._lock:
+            self._latency.clear()
+            self._statuses.clear()
+            self._statements.clear()
+            self._db_seconds.clear()
+
+    def render(self):
+        """Devuelve las métricas en el formato de texto de Prometheus."""
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP users_request_duration_seconds Request latency.',
+                '# TYPE users_request_duration_seconds histogram',
+            ]
+            for (endpoint, method), histogram in sorted(
+                    self._latency.items()):
+                labels = _labels(endpoint=endpoint, method=method)
+                for bound, count in histogram.cumulative():
+                    lines.append(
+                        'users_request_duration_seconds_bucket'
+                        f'{{{labels},le="{bound}"}} {count}')
+                lines += [
+                    'users_request_duration_seconds_bucket'
+                    f'{{{labels},le="+Inf"}} {histogram.count}',
+                    'users_request_duration_seconds_sum'
+                    f'{{{labels}}} {histogram.total:.6f}',
+                    'users_request_duration_seconds_count'
+                    f'{{{labels}}} {histogram.count}',
+                ]
+            lines += [
+                '# HELP users_requests_total Requests by status code.',
+                '# TYPE users_requests_total counter',
+            ]
+            for (endpoint, method, status), count in sorted(
+                    self._statuses.items()):
+                labels = _labels(
+                    endpoint=endpoint, method=method, status=status)
+                lines.append(f'users_requests_total{{{labels}}} {count}')
+            lines += [
+                '# HELP users_db_statements_total SQL statements executed.',
+                '# TYPE users_db_statements_total counter',
+            ]
+            for endpoint, count in sorted(self._statements.items()):
+                labels = _labels(endpoint=endpoint)
+                lines.append(
+                    f'users_db_statements_total{{{labels}}} {count}')
+            lines += [
+                '# HELP users_db_seconds_total Time spent executing SQL.',
+                '# TYPE users_db_seconds_total counter',
+            ]
+            for endpoint, seconds in sorted(self._db_seconds.items()):
+                labels = _labels(endpoint=endpoint)
+                lines.append(
+                    f'users_db_seconds_total{{{labels}}} {seconds:.6f}')
+        return '\n'.join(lines) + '\n'
+
+
+def render_values(prefix, values, counters=()):
+    """Convierte un diccionario de estadísticas en métricas de Prometheus
+
+    Las claves en `counters` se exponen como contadores (`_total`) y el
+    resto de valores numéricos como gauges.
+    """
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        if key in counters:
+            name, metric_type = f'{prefix}_{key}_total', 'counter'
+        else:
+            name, metric_type = f'{prefix}_{key}', 'gauge'
+        lines += [f'# TYPE {name} {metric_type}', f'{name} {value}']
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if has_request_context() and 'metrics_statements' in g:
+        conn.info.setdefault('metrics_query_start', []).append(
+            time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    starts = conn.info.get('metrics_query_start')
+    if starts and has_request_context() and 'metrics_statements' in g:
+        g.metrics_db_seconds += time.perf_counter() - starts.pop()
+        g.metrics_statements += 1
+
+
+def _handle_error(context):
+    starts = context.connection.info.get('metrics_query_start') \
+        if context.connection is not None else None
+    if starts:
+        starts.pop()
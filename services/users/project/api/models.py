@@ -1,31 +1,477 @@
 # services/users/project/api/models.py
 
 
-from sqlalchemy.sql import func
+from collections import Counter
+from datetime import datetime, timedelta
 
-from project import db, bcrypt
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy import and_, event, exc, or_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import attributes, column_property
+from sqlalchemy.sql import bindparam, case, func, select, text, update
+
+from project import db, hasher, user_cache
+
+
+USER_PUBLIC_FIELDS = ('id', 'username', 'email', 'active')
+
+
+def user_json(user):
+    """Representación pública de un usuario, objeto del ORM o fila"""
+    return {field: getattr(user, field) for field in USER_PUBLIC_FIELDS}
+
+
+SEARCH_COLUMNS = ('username', 'email')
+
+
+def search_indexes(dialect):
+    """Nombre y DDL de los índices de búsqueda sobre `lower(columna)`
+
+    Dependen del motor: en PostgreSQL `text_pattern_ops` para prefijos y
+    trigramas para subcadenas; en los demás un índice de expresión.
+    """
+    indexes = []
+    for column in SEARCH_COLUMNS:
+        if dialect == 'postgresql':
+            name = f'ix_users_{column}_lower_pattern'
+            indexes.append((name, f'CREATE INDEX {name} ON users '
+                                  f'(lower({column}) text_pattern_ops)'))
+            name = f'ix_users_{column}_lower_trgm'
+            indexes.append((name, f'CREATE INDEX {name} ON users '
+                                  f'USING gin (lower({column}) gin_trgm_ops)'))
+        else:
+            name = f'ix_users_{column}_lower'
+            indexes.append(
+                (name, f'CREATE INDEX {name} ON users (lower({column}))'))
+    return indexes
 
 
 class User(db.Model):
 
     __tablename__ = 'users'
+    # las migraciones los crean con CONCURRENTLY en PostgreSQL; los de
+    # búsqueda dependen del motor y se declaran en `info`
+    __table_args__ = (
+        db.Index('ix_users_created_date', 'created_date'),
+        db.Index('ix_users_active_id', 'active', 'id'),
+        {'info': {'dialect_indexes': search_indexes}},
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     username = db.Column(db.String(128), unique=True, nullable=False)
     email = db.Column(db.String(128), unique=True, nullable=False)
     password = db.Column(db.String(225))
-    active = db.Column(db.Boolean(), default=True, nullable=False)
+    # active_history: el valor anterior hace falta para los contadores
+    active = column_property(
+        db.Column(db.Boolean(), default=True, nullable=False),
+        active_history=True)
     created_date = db.Column(db.DateTime, default=func.now(), nullable=False)
 
     def to_json(self):
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'active': self.active
-        }
+        return user_json(self)
 
     def __init__(self, username, email, password):
         self.username = username
         self.email = email
-        self.password = bcrypt.generate_password_hash(password).decode()
+        self.password = hasher.hash(password)
+
+
+@event.listens_for(User.__table__, 'after_create')
+def _create_search_indexes(target, connection, **kw):
+    if connection.dialect.name == 'postgresql':
+        connection.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for _, statement in search_indexes(connection.dialect.name):
+        connection.execute(statement)
+
+
+def user_rows():
+    """Consulta solo las columnas públicas de `users` como filas planas
+
+    Evita construir objetos del ORM y leer `password` y `created_date`.
+    """
+    return db.session.query(
+        *[getattr(User, field) for field in USER_PUBLIC_FIELDS])
+
+
+def _like_pattern(text):
+    return text.lower().replace('\\', '\\\\') \
+        .replace('%', '\\%').replace('_', '\\_')
+
+
+def search_users(text, limit, contains=False):
+    """Busca usuarios por prefijo (o subcadena) de `username` o `email`
+
+    La comparación es sobre `lower(columna)`, la misma expresión de
+    `search_indexes` (`text_pattern_ops` para prefijos y trigramas para
+    subcadenas en PostgreSQL). No se ordena en SQL para
+    que el `LIMIT` corte la búsqueda apenas encuentra suficientes filas;
+    el resultado se ordena por id.
+    """
+    pattern = _like_pattern(text) + '%'
+    if contains:
+        pattern = '%' + pattern
+    rows = user_rows().filter(or_(
+        func.lower(User.username).like(pattern, escape='\\'),
+        func.lower(User.email).like(pattern, escape='\\'),
+    )).limit(limit).all()
+    return sorted(rows, key=lambda row: row.id)
+
+
+class CollectionVersion(db.Model):
+    """Versión de una colección, avanza con cada escritura sobre ella"""
+
+    __tablename__ = 'collection_versions'
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, default=0, nullable=False)
+
+
+@event.listens_for(CollectionVersion.__table__, 'after_create')
+def _insert_collection_versions(target, connection, **kw):
+    connection.execute(target.insert(), [{'name': 'users', 'version': 0}])
+
+
+class UserChange(db.Model):
+    """Registro ordenado de los usuarios escritos; `id` es el cursor"""
+
+    __tablename__ = 'user_changes'
+
+    id = db.Column(
+        db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    changed_date = db.Column(
+        db.DateTime, server_default=func.now(), nullable=False, index=True)
+
+
+class UserCounter(db.Model):
+    """Contadores de `users` que se actualizan en cada escritura"""
+
+    __tablename__ = 'user_counters'
+
+    name = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.BigInteger, default=0, nullable=False)
+
+
+@event.listens_for(UserCounter.__table__, 'after_create')
+def _insert_user_counters(target, connection, **kw):
+    connection.execute(target.insert(), [
+        {'name': 'total', 'value': 0}, {'name': 'active', 'value': 0}])
+
+
+class UserSignups(db.Model):
+    """Altas de usuarios por día de `created_date`"""
+
+    __tablename__ = 'user_signups'
+
+    day = db.Column(db.Date, primary_key=True)
+    signups = db.Column(db.BigInteger, default=0, nullable=False)
+
+
+# UPSERT con la misma sintaxis en PostgreSQL y SQLite (3.24+); `day` nulo
+# es la fecha actual de la base (la misma de `func.now()` en `created_date`)
+SIGNUPS_UPSERT = text("""
+    INSERT INTO user_signups (day, signups)
+    VALUES (COALESCE(:day, CURRENT_DATE), :delta)
+    ON CONFLICT (day) DO UPDATE
+    SET signups = user_signups.signups + excluded.signups
+""").bindparams(bindparam('day', type_=db.Date))
+
+
+def _add_signups(session, day, delta):
+    """Suma `delta` altas al día `day`, o a la fecha actual si es `None`."""
+    session.execute(SIGNUPS_UPSERT, {'day': day, 'delta': delta})
+
+
+def _add_to_counters(session, **deltas):
+    """Suma los `deltas` a `user_counters` en un único UPDATE."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas:
+        counters = UserCounter.__table__
+        session.execute(
+            update(counters).where(counters.c.name.in_(deltas))
+            .values(value=counters.c.value + case(
+                deltas, value=counters.c.name)))
+
+
+def database_date():
+    """Fecha actual de la base de datos, con la que se agrupan las altas."""
+    return db.session.query(func.current_date()).scalar()
+
+
+def user_stats(days):
+    """Devuelve los contadores y las altas de los últimos `days` días
+
+    Solo lee `user_counters` y `user_signups`, nunca `users`.
+    """
+    counters = dict(db.session.query(UserCounter.name, UserCounter.value))
+    first_day = database_date() - timedelta(days=days - 1)
+    signups = db.session.query(UserSignups.day, UserSignups.signups) \
+        .filter(UserSignups.day >= first_day, UserSignups.signups > 0) \
+        .order_by(UserSignups.day).all()
+    total = counters.get('total', 0)
+    active = counters.get('active', 0)
+    return {
+        'total': total,
+        'active': active,
+        'inactive': total - active,
+        'signups': [
+            {'day': day.isoformat(), 'count': count}
+            for day, count in signups
+        ]
+    }
+
+
+def rebuild_user_stats():
+    """Recalcula `user_counters` y `user_signups` recorriendo `users`
+
+    Registra una escritura primero, así toma el bloqueo de la versión y
+    ninguna escritura concurrente se cuenta dos veces.
+    """
+    users_written(db.session)
+    counters = UserCounter.__table__
+    signups = UserSignups.__table__
+    total, active = db.session.query(
+        func.count(User.id),
+        func.coalesce(func.sum(case([(User.active, 1)], else_=0)), 0)).one()
+    db.session.execute(counters.delete())
+    db.session.execute(counters.insert(), [
+        {'name': 'total', 'value': total},
+        {'name': 'active', 'value': active}])
+    day = func.date(User.created_date)
+    db.session.execute(signups.delete())
+    db.session.execute(signups.insert().from_select(
+        ['day', 'signups'],
+        select([day, func.count()]).group_by(day)))
+    db.session.commit()
+    return total, active
+
+
+def users_version():
+    """Devuelve la versión actual de la colección `users`."""
+    return db.session.query(CollectionVersion.version).filter_by(
+        name='users').scalar() or 0
+
+
+def users_written(session, user_ids=(), id_query=None, created=0,
+                  active_delta=0, total_delta=0, signups=None):
+    """Registra una escritura sobre `users` en la transacción de `session`
+
+    La primera escritura de la transacción avanza la versión de la
+    colección, así el cambio de versión se confirma junto con los datos.
+    Los ids escritos (o los que devuelve la consulta `id_query`, para
+    inserciones masivas) se agregan a `user_changes`; como la versión
+    bloquea su fila hasta el commit, los ids de `user_changes` quedan en
+    orden de commit. `created` es la cantidad de usuarios nuevos creados
+    hoy y `active_delta` el cambio en la cantidad de usuarios activos;
+    `total_delta` y `signups` (altas por día) cubren los demás casos. Se
+    suman a `user_counters` y `user_signups` sin consultar `users`. Las
+    escrituras por el ORM se registran solas; las que usan sentencias core
+    (`insert`/`update` sobre `users`) deben llamar a esta función. Al
+    confirmar la transacción se invalidan los ids en la caché.
+    """
+    if 'written_user_ids' not in session.info:
+        session.execute(
+            update(CollectionVersion.__table__)
+            .where(CollectionVersion.name == 'users')
+            .values(version=CollectionVersion.version + 1))
+        session.info['written_user_ids'] = set()
+        db.record_write()
+    written = session.info['written_user_ids']
+    new_ids = set(user_ids) - written
+    if new_ids:
+        session.execute(UserChange.__table__.insert(), [
+            {'user_id': user_id} for user_id in sorted(new_ids)])
+        written.update(new_ids)
+    if id_query is not None:
+        session.execute(UserChange.__table__.insert().from_select(
+            ['user_id'], id_query))
+    signups = Counter(signups or {})
+    if created:
+        total_delta += created
+        signups[None] += created
+    _add_to_counters(session, total=total_delta, active=active_delta)
+    for day, delta in signups.items():
+        if delta:
+            _add_signups(session, day, delta)
+
+
+def user_changes(since, limit):
+    """Devuelve los cambios posteriores al cursor `since`
+
+    Cada fila trae el cursor y el estado actual del usuario.
+    """
+    return db.session.query(
+        UserChange.id.label('cursor'),
+        *[getattr(User, field) for field in USER_PUBLIC_FIELDS]
+    ).join(User, User.id == UserChange.user_id) \
+        .filter(UserChange.id > since).order_by(UserChange.id) \
+        .limit(limit).all()
+
+
+def user_changes_cursor():
+    """Devuelve el último cursor de `user_changes` y el primero válido."""
+    latest = db.session.query(func.max(UserChange.id)).scalar() or 0
+    pruned = db.session.query(CollectionVersion.version).filter_by(
+        name='user_changes_pruned').scalar() or 0
+    return max(latest, pruned), pruned
+
+
+def prune_user_changes(before):
+    """Borra los cambios anteriores a `before` y recuerda hasta qué cursor
+    se borró, para rechazar los cursores que ya no se pueden seguir."""
+    pruned = db.session.query(func.max(UserChange.id)).filter(
+        UserChange.changed_date < before).scalar()
+    if pruned is None:
+        return 0
+    deleted = UserChange.query.filter(UserChange.id <= pruned) \
+        .delete(synchronize_session=False)
+    marker = CollectionVersion.query.get('user_changes_pruned')
+    if marker is None:
+        db.session.add(CollectionVersion(
+            name='user_changes_pruned', version=pruned))
+    else:
+        marker.version = pruned
+    db.session.commit()
+    return deleted
+
+
+def insert_user(username, email, password):
+    """Inserta un usuario con una sola sentencia, sin consulta previa
+
+    Usa `INSERT ... ON CONFLICT DO NOTHING RETURNING id` en PostgreSQL e
+    `INSERT OR IGNORE` en SQLite, así dos peticiones concurrentes con el
+    mismo email no terminan en un `IntegrityError`. Devuelve el id del
+    nuevo usuario, o `None` si el email o el nombre de usuario ya existen.
+    """
+    table = User.__table__
+    values = {
+        'username': username,
+        'email': email,
+        'password': hasher.hash(password)
+    }
+    dialect = db.session.get_bind(User.__mapper__).dialect.name
+    if dialect == 'postgresql':
+        statement = postgresql.insert(table).values(**values) \
+            .on_conflict_do_nothing().returning(table.c.id)
+        user_id = db.session.execute(statement).scalar()
+    elif dialect == 'sqlite':
+        result = db.session.execute(
+            table.insert().prefix_with('OR IGNORE').values(**values))
+        user_id = result.lastrowid if result.rowcount else None
+    else:
+        try:
+            with db.session.begin_nested():
+                user_id = db.session.execute(
+                    table.insert().values(**values)).inserted_primary_key[0]
+        except exc.IntegrityError:
+            user_id = None
+    if user_id is not None:
+        users_written(db.session, [user_id], created=1, active_delta=1)
+    return user_id
+
+
+def users_filter(created_after=None, created_before=None,
+                 email_domain=None):
+    """Condición sobre `users` para las operaciones en bloque"""
+    conditions = []
+    if created_after is not None:
+        conditions.append(User.created_date >= created_after)
+    if created_before is not None:
+        conditions.append(User.created_date < created_before)
+    if email_domain is not None:
+        conditions.append(func.lower(User.email).like(
+            '%@' + _like_pattern(email_domain.lstrip('@')), escape='\\'))
+    return and_(*conditions)
+
+
+def set_users_active(active, user_filter, chunk_size):
+    """Cambia `active` en los usuarios que cumplen `user_filter`
+
+    Recorre los ids por rangos de clave primaria y ejecuta un
+    `UPDATE ... WHERE id IN (...)` por bloque, sin cargar objetos del ORM.
+    Cada bloque se confirma por separado para no retener el bloqueo de la
+    versión de `users` durante toda la operación. Devuelve la cantidad de
+    filas modificadas.
+    """
+    table = User.__table__
+    # igualdad y no `!=` para recorrer el índice (active, id)
+    pending = user_filter & (table.c.active == (not active))
+    updated = last_id = 0
+    while True:
+        ids = [row[0] for row in db.session.execute(
+            select([table.c.id]).where(pending & (table.c.id > last_id))
+            .order_by(table.c.id).limit(chunk_size))]
+        if not ids:
+            return updated
+        result = db.session.execute(
+            update(table).where(table.c.id.in_(ids) & pending)
+            .values(active=active))
+        users_written(
+            db.session, ids,
+            active_delta=result.rowcount if active else -result.rowcount)
+        db.session.commit()
+        updated += result.rowcount
+        last_id = ids[-1]
+
+
+def user_conflict(username, email):
+    """Indica qué campo único ya está en uso: `'email'` o `'username'`."""
+    existing = db.session.query(User.email).filter(
+        or_(User.email == email, User.username == username)).all()
+    if any(row.email == email for row in existing):
+        return 'email'
+    return 'username' if existing else None
+
+
+def _created_day(instance):
+    # sin leer atributos expirados: `created_date` por defecto es `now()`
+    created_date = instance.__dict__.get('created_date')
+    return created_date.date() if isinstance(created_date, datetime) \
+        else None
+
+
+@event.listens_for(SignallingSession, 'after_flush')
+def _collect_written_users(session, flush_context):
+    created = [
+        instance for instance in session.new if isinstance(instance, User)
+    ]
+    changed = set()
+    active_delta = 0
+    for instance in session.dirty:
+        # `dirty` incluye atributos asignados con el mismo valor
+        if not isinstance(instance, User) or \
+                not session.is_modified(instance):
+            continue
+        changed.add(instance.id)
+        history = attributes.get_history(instance, 'active')
+        if history.added and history.deleted and \
+                bool(history.added[0]) != bool(history.deleted[0]):
+            active_delta += 1 if history.added[0] else -1
+    deleted = [
+        instance for instance in session.deleted
+        if isinstance(instance, User)
+    ]
+    if not (created or changed or deleted):
+        return
+    changed.update(instance.id for instance in created)
+    changed.update(instance.id for instance in deleted)
+    active_delta += sum(
+        1 for instance in created if instance.__dict__.get('active', True))
+    active_delta -= sum(1 for instance in deleted if instance.active)
+    signups = Counter(map(_created_day, created))
+    signups.subtract(instance.created_date.date() for instance in deleted)
+    users_written(
+        session, changed, active_delta=active_delta,
+        total_delta=len(created) - len(deleted), signups=signups)
+
+
+@event.listens_for(SignallingSession, 'after_commit')
+def _invalidate_written_users(session):
+    user_ids = session.info.pop('written_user_ids', None)
+    if user_ids:
+        user_cache.invalidate(user_ids)
+
+
+@event.listens_for(SignallingSession, 'after_rollback')
+def _discard_written_users(session):
+    session.info.pop('written_user_ids', None)
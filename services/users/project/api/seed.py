@@ -0,0 +1,78 @@
+# services/users/project/api/seed.py
+
+
+import csv
+import io
+
+from sqlalchemy.sql import func
+
+from project import db, hasher
+from project.api.models import User, users_written
+
+
+SEED_PASSWORD = 'greaterthaneight'
+
+
+def _copy_rows(rows, now):
+    """Inserta `rows` con `COPY ... FROM STDIN` de PostgreSQL
+
+    `now` es el `now()` de la base de datos, el mismo que usa el
+    `INSERT` por defecto y con el que se agrupan las altas.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    now = now.isoformat()
+    for row in rows:
+        writer.writerow(
+            (row['username'], row['email'], row['password'], 't', now))
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            'COPY users (username, email, password, active, created_date) '
+            'FROM STDIN WITH (FORMAT csv)', buffer)
+    finally:
+        cursor.close()
+
+
+def seed_users(count, chunk_size=10000, precomputed_hash=False,
+               progress=None):
+    """Inserta `count` usuarios sintéticos únicos por lotes
+
+    Cada lote se genera, se inserta (con `COPY` en PostgreSQL o un
+    `executemany` en otros motores) y se confirma antes del siguiente,
+    así la memoria no crece con `count`. Los hashes se calculan en el pool
+    de procesos o, con `precomputed_hash`, se reutiliza uno solo.
+    `progress(done, count)` se llama después de cada lote.
+    """
+    offset = (db.session.query(func.max(User.id)).scalar() or 0) + 1
+    shared_hash = hasher.hash(SEED_PASSWORD) if precomputed_hash else None
+    use_copy = db.session.get_bind(User.__mapper__).dialect.name == \
+        'postgresql'
+    done = 0
+    while done < count:
+        size = min(chunk_size, count - done)
+        numbers = range(offset + done, offset + done + size)
+        if shared_hash is None:
+            hashes = hasher.hash_many([SEED_PASSWORD] * size)
+        else:
+            hashes = [shared_hash] * size
+        rows = [
+            {'username': f'seed{n}', 'email': f'seed{n}@example.com',
+             'password': password}
+            for n, password in zip(numbers, hashes)
+        ]
+        last_id, now = db.session.query(func.max(User.id), func.now()).one()
+        last_id = last_id or 0
+        if use_copy:
+            _copy_rows(rows, now)
+        else:
+            db.session.execute(User.__table__.insert(), rows)
+        users_written(
+            db.session, created=size, active_delta=size,
+            id_query=db.select([User.id]).where(User.id > last_id))
+        db.session.commit()
+        done += size
+        if progress is not None:
+            progress(done, count)
+    return done
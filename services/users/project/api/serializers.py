@@ -0,0 +1,24 @@
+# services/users/project/api/serializers.py
+
+
+import json
+
+from flask import current_app
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj):
+    """Codifica `obj` como JSON en bytes, con orjson si está instalado."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(obj, status=200):
+    """Como `jsonify`, pero con el codificador rápido cuando existe."""
+    return current_app.response_class(
+        dumps(obj), status=status, mimetype='application/json')
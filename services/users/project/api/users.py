@@ -1,16 +1,97 @@
 # services/users/project/api/users.py
 
-from flask import Blueprint, jsonify, request, render_template
+import csv
+import hashlib
+import io
+import json
+import math
+import time
+from datetime import datetime
+from functools import partial, wraps
+
+from flask import (
+    Blueprint, jsonify, request, render_template, current_app, Response,
+    make_response, stream_with_context, g
+)
+from markupsafe import Markup
 # from flask import Blueprint, jsonify, request
-from sqlalchemy import exc
+from sqlalchemy import exc, or_
 
-from project.api.models import User
-from project import db
+from project.api.cache import MemoryCache
+from project.api.compression import etag_variants
+from project.api.hashing import HashingQueueFull
+from project.api.models import (
+    USER_PUBLIC_FIELDS, User, database_date, insert_user, search_users,
+    set_users_active, user_changes, user_changes_cursor, user_conflict,
+    user_json, user_rows, user_stats, users_filter, users_version,
+    users_written
+)
+from project.api.metrics import render_values
+from project.api.serializers import json_response
+from project.database import pool_stats
+from project import admission, db, hasher, metrics, user_cache
 
 
 # users_blueprint = Blueprint('users', __name__)
 users_blueprint = Blueprint('users', __name__, template_folder='./templates')
 
+# rango de `users.id` (Integer) y de los cursores de `user_changes`
+# (BigInteger): un número mayor desborda el parámetro de la consulta
+MAX_USER_ID = 2 ** 31 - 1
+MAX_CURSOR = 2 ** 63 - 1
+
+
+def _int_arg(value, maximum):
+    """`int(value)` que levanta ValueError fuera de ±`maximum`."""
+    number = int(value)
+    if not -maximum - 1 <= number <= maximum:
+        raise ValueError(f'{value} fuera de rango')
+    return number
+
+
+def conditional(view=None, extra=None):
+    """Agrega un ETag fuerte basado en la versión de `users`
+
+    Si el cliente envía un `If-None-Match` que coincide (también con el
+    sufijo de la compresión) responde 304 sin ejecutar la vista, es decir
+    sin consultar ni serializar filas. Solo aplica a GET y HEAD. `extra`
+    devuelve lo que, además de las escrituras, cambia la respuesta (p. ej.
+    la fecha) y se agrega al ETag.
+    """
+    if view is None:
+        return partial(conditional, extra=extra)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(*args, **kwargs)
+        path = hashlib.sha1(request.full_path.encode()).hexdigest()[:16]
+        # la vista puede usarla para no servir datos anteriores (caché)
+        g.users_version = users_version()
+        etag = f'users-{g.users_version}-{path}'
+        if extra is not None:
+            etag = f'{etag}-{extra()}'
+        for variant in etag_variants(etag):
+            if request.if_none_match.contains_weak(variant):
+                response = make_response('', 304)
+                response.set_etag(variant)
+                return response
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag)
+        return response
+    return wrapper
+
+
+@users_blueprint.errorhandler(HashingQueueFull)
+def hashing_queue_full(error):
+    db.session.rollback()
+    response_object = {
+        'status': 'falló',
+        'message': 'Servicio ocupado, intente más tarde.'
+    }
+    return jsonify(response_object), 503, {'Retry-After': '1'}
+
 
 @users_blueprint.route('/users/ping', methods=['GET'])
 def ping_pong():
@@ -20,19 +101,65 @@ def ping_pong():
     })
 
 
+@users_blueprint.record
+def init_index_cache(state):
+    config = state.app.config
+    state.app.extensions['users_index_cache'] = MemoryCache(
+        config.get('USERS_INDEX_CACHE_SIZE', 256),
+        config.get('USERS_CACHE_TTL', 60))
+
+
+def render_users_page(page):
+    """Devuelve el fragmento HTML con la página `page` de usuarios
+
+    El fragmento se cachea por página y versión de `users`: cualquier
+    escritura (p. ej. el POST del formulario) avanza la versión y deja
+    sin uso las páginas cacheadas.
+    """
+    cache = current_app.extensions['users_index_cache']
+    key = f'index:{users_version()}:{page}'
+    fragment = cache.get(key)
+    if fragment is None:
+        per_page = current_app.config['USERS_INDEX_PAGE_SIZE']
+        offset = (page - 1) * per_page
+        rows = user_rows().order_by(User.id).offset(offset) \
+            .limit(per_page + 1).all()
+        fragment = render_template(
+            '_users_page.html', users=rows[:per_page], page=page,
+            start=offset + 1, has_next=len(rows) > per_page)
+        cache.set(key, fragment)
+    return Markup(fragment)
+
+
 @users_blueprint.route('/', methods=['GET', 'POST'])
+@admission.limit_writes
+@conditional
 def index():
+    """Página principal con los usuarios paginados
+
+    La cabecera y el formulario se envían antes de consultar la base de
+    datos; la lista se agrega al llegar a ella en la plantilla.
+    """
+    # una página mayor desbordaría el OFFSET ya con la respuesta en curso
+    max_page = MAX_USER_ID // current_app.config['USERS_INDEX_PAGE_SIZE'] + 1
+    try:
+        page = max(_int_arg(request.args.get('page', 1), max_page), 1)
+    except ValueError:
+        return 'Página inválida.', 400
     if request.method == 'POST':
         username = request.form['username']
         email = request.form['email']
         password = request.form['password']
         db.session.add(User(username=username, email=email, password=password))
         db.session.commit()
-    users = User.query.all()
-    return render_template('index.html', users=users)
+    context = {'users_page': lambda: render_users_page(page)}
+    current_app.update_template_context(context)
+    template = current_app.jinja_env.get_template('index.html')
+    return Response(stream_with_context(template.stream(context)))
 
 
 @users_blueprint.route('/users', methods=['POST'])
+@admission.limit_writes
 def add_user():
     post_data = request.get_json()
     response_object = {
@@ -44,26 +171,197 @@ def add_user():
     username = post_data.get('username')
     email = post_data.get('email')
     password = post_data.get('password')
-    try:
-        user = User.query.filter_by(email=email).first()
-        if not user:
-            db.session.add(User(
-                username=username,
-                email=email,
-                password=password))
-            db.session.commit()
-            response_object['status'] = 'success'
-            response_object['message'] = f'{email} ha sido agregado!'
-            return jsonify(response_object), 201
+    if not all(isinstance(value, str) and value
+               for value in (username, email, password)):
+        return jsonify(response_object), 400
+    if insert_user(username, email, password) is not None:
+        db.session.commit()
+        response_object['status'] = 'success'
+        response_object['message'] = f'{email} ha sido agregado!'
+        return jsonify(response_object), 201
+    # el conflicto se resuelve solo en este camino, el feliz es un INSERT
+    db.session.rollback()
+    if user_conflict(username, email) == 'email':
+        response_object['message'] = 'Disculpa. El email ya existe.'
+    else:
+        response_object['message'] = \
+            'Disculpa. El nombre de usuario ya existe.'
+    return jsonify(response_object), 400
+
+
+@users_blueprint.route('/users/bulk', methods=['POST'])
+@admission.limit_writes
+def add_users_bulk():
+    """Agregando muchos usuarios en una sola petición
+
+    Los duplicados se detectan con una única consulta `IN`, los hashes se
+    calculan en un pool de procesos y las filas se insertan por lotes en
+    una sola transacción. Devuelve un resultado por cada elemento.
+    """
+    post_data = request.get_json()
+    response_object = {
+        'status': 'falló',
+        'message': 'Carga inválida.'
+    }
+    if not isinstance(post_data, list) or not post_data or \
+            len(post_data) > current_app.config['USERS_BULK_MAX_SIZE']:
+        return jsonify(response_object), 400
+    results = [None] * len(post_data)
+    pending = []
+    emails, usernames = set(), set()
+    for index, item in enumerate(post_data):
+        fields = item if isinstance(item, dict) else {}
+        username = fields.get('username')
+        email = fields.get('email')
+        password = fields.get('password')
+        if not all(isinstance(value, str) and value
+                   for value in (username, email, password)):
+            results[index] = dict(response_object)
+        elif email in emails:
+            results[index] = {
+                'status': 'falló',
+                'message': 'Disculpa. El email ya existe.'
+            }
+        elif username in usernames:
+            results[index] = {
+                'status': 'falló',
+                'message': 'Disculpa. El nombre de usuario ya existe.'
+            }
         else:
-            response_object['message'] = 'Disculpa. El email ya existe.'
-            return jsonify(response_object), 400
-    except exc.IntegrityError:
-        db.session.rollback()
+            emails.add(email)
+            usernames.add(username)
+            pending.append((index, username, email, password))
+    if pending:
+        existing = db.session.query(User.username, User.email).filter(or_(
+            User.email.in_(emails), User.username.in_(usernames))).all()
+        taken_emails = {email for _, email in existing}
+        taken_usernames = {username for username, _ in existing}
+        accepted = []
+        for index, username, email, password in pending:
+            if email in taken_emails:
+                results[index] = {
+                    'status': 'falló',
+                    'message': 'Disculpa. El email ya existe.'
+                }
+            elif username in taken_usernames:
+                results[index] = {
+                    'status': 'falló',
+                    'message': 'Disculpa. El nombre de usuario ya existe.'
+                }
+            else:
+                accepted.append((index, username, email, password))
+        hashes = hasher.hash_many([password for *_, password in accepted])
+        rows = [
+            {'username': username, 'email': email, 'password': password}
+            for (_, username, email, _), password in zip(accepted, hashes)
+        ]
+        chunk_size = current_app.config['USERS_BULK_CHUNK_SIZE']
+        try:
+            for start in range(0, len(rows), chunk_size):
+                db.session.execute(
+                    User.__table__.insert(), rows[start:start + chunk_size])
+            users_written(
+                db.session, created=len(rows), active_delta=len(rows),
+                id_query=db.select([User.id]).where(
+                    User.email.in_([row['email'] for row in rows])))
+            db.session.commit()
+        except exc.IntegrityError:
+            # otra petición insertó alguno de los usuarios en paralelo
+            db.session.rollback()
+            response_object['message'] = \
+                'Disculpa. Algunos usuarios ya existen, intente de nuevo.'
+            return jsonify(response_object), 409
+        for index, _, email, _ in accepted:
+            results[index] = {
+                'status': 'success',
+                'message': f'{email} ha sido agregado!'
+            }
+    created = sum(result['status'] == 'success' for result in results)
+    response_object = {
+        'status': 'success',
+        'data': {
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        }
+    }
+    return jsonify(response_object), 200
+
+
+def _users_filter(fields):
+    """Valida el filtro de `PATCH /users` y lo convierte en condición SQL
+
+    Claves admitidas: `created_after`, `created_before` (fechas ISO) y
+    `email_domain`. Devuelve `None` si el filtro es inválido o vacío.
+    """
+    if not isinstance(fields, dict) or not fields or \
+            not set(fields) <= {'created_after', 'created_before',
+                                'email_domain'}:
+        return None
+    try:
+        created_after, created_before = [
+            datetime.fromisoformat(fields[key]) if key in fields else None
+            for key in ('created_after', 'created_before')
+        ]
+    except (TypeError, ValueError):
+        return None
+    email_domain = fields.get('email_domain')
+    if 'email_domain' in fields and \
+            not (isinstance(email_domain, str) and email_domain.strip('@')):
+        return None
+    return users_filter(created_after, created_before, email_domain)
+
+
+@users_blueprint.route('/users', methods=['PATCH'])
+@admission.limit_writes
+def update_users_active():
+    """Activando o desactivando usuarios en bloque
+
+    Recibe `active` y una lista de `ids` o un `filter`; actualiza por
+    bloques sin cargar los usuarios y devuelve las filas modificadas.
+    """
+    post_data = request.get_json()
+    response_object = {
+        'status': 'falló',
+        'message': 'Carga inválida.'
+    }
+    if not isinstance(post_data, dict) or \
+            not isinstance(post_data.get('active'), bool) or \
+            ('ids' in post_data) == ('filter' in post_data):
         return jsonify(response_object), 400
+    if 'ids' in post_data:
+        ids = post_data['ids']
+        if not isinstance(ids, list) or not ids or \
+                len(ids) > current_app.config['USERS_UPDATE_MAX_IDS'] or \
+                not all(isinstance(user_id, int) and
+                        not isinstance(user_id, bool) and
+                        abs(user_id) <= MAX_USER_ID for user_id in ids):
+            return jsonify(response_object), 400
+        user_filter = User.id.in_(ids)
+    else:
+        user_filter = _users_filter(post_data['filter'])
+        if user_filter is None:
+            return jsonify(response_object), 400
+    updated = set_users_active(
+        post_data['active'], user_filter,
+        current_app.config['USERS_BULK_CHUNK_SIZE'])
+    response_object = {
+        'status': 'success',
+        'data': {
+            'updated': updated
+        }
+    }
+    return jsonify(response_object), 200
+
+
+def _load_user(user_id):
+    row = user_rows().filter(User.id == user_id).first()
+    return user_json(row) if row else None
 
 
 @users_blueprint.route('/users/<user_id>', methods=['GET'])
+@db.read_only
+@conditional
 def get_single_user(user_id):
     """Obteniendo detalles de un usuario único"""
     response_object = {
@@ -71,31 +369,336 @@ def get_single_user(user_id):
         'message': 'Usuario no existe'
     }
     try:
-        user = User.query.filter_by(id=int(user_id)).first()
+        # lo leído de la réplica no se cachea: puede estar atrasado y
+        # quien escribió leería esa copia en vez del primario
+        user = user_cache.get_or_load(
+            _int_arg(user_id, MAX_USER_ID), _load_user,
+            store=not db.reading_replica(), version=g.users_version)
         if not user:
             return jsonify(response_object), 404
         else:
             response_object = {
                 'status': 'success',
-                'data': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'active': user.active
-                }
+                'data': user
             }
             return jsonify(response_object), 200
     except ValueError:
         return jsonify(response_object), 404
 
 
+@users_blueprint.route('/users/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Obteniendo los contadores de la caché de usuarios"""
+    response_object = {
+        'status': 'success',
+        'data': user_cache.stats()
+    }
+    return jsonify(response_object), 200
+
+
+@users_blueprint.route('/users/search', methods=['GET'])
+@db.read_only
+def search():
+    """Buscando usuarios por nombre de usuario o email
+
+    `match=prefix` (por defecto) busca por prefijo y `match=contains` por
+    subcadena, en ambos casos sin distinguir mayúsculas.
+    """
+    response_object = {
+        'status': 'falló',
+        'message': 'Parámetros de búsqueda inválidos.'
+    }
+    text = request.args.get('q', '').strip()
+    match = request.args.get('match', 'prefix')
+    try:
+        limit = int(request.args.get(
+            'limit', current_app.config['USERS_SEARCH_LIMIT']))
+    except ValueError:
+        return jsonify(response_object), 400
+    min_length = current_app.config['USERS_SEARCH_CONTAINS_MIN_LENGTH'] \
+        if match == 'contains' else 1
+    if match not in ('prefix', 'contains') or len(text) < min_length or \
+            limit < 1:
+        return jsonify(response_object), 400
+    limit = min(limit, current_app.config['USERS_SEARCH_MAX_LIMIT'])
+    rows = search_users(text, limit, contains=match == 'contains')
+    response_object = {
+        'status': 'success',
+        'data': {
+            'users': [user_json(row) for row in rows]
+        }
+    }
+    return json_response(response_object)
+
+
+@users_blueprint.route('/users/pool/stats', methods=['GET'])
+def get_pool_stats():
+    """Obteniendo el estado del pool de conexiones a la base de datos"""
+    response_object = {
+        'status': 'success',
+        'data': pool_stats(db.get_engine())
+    }
+    if db.has_replica():
+        response_object['data']['replica'] = dict(
+            pool_stats(db.get_engine(bind='replica')), **db.replica_stats())
+    return jsonify(response_object), 200
+
+
+@users_blueprint.route('/users/metrics', methods=['GET'])
+def get_metrics():
+    """Obteniendo las métricas del servicio en formato Prometheus"""
+    body = metrics.render()
+    body += render_values(
+        'users_cache', user_cache.stats(), counters=('hits', 'misses'))
+    body += render_values(
+        'users_db_pool', pool_stats(db.get_engine()),
+        counters=('checkouts', 'checkout_wait_seconds', 'checkout_timeouts',
+                  'invalidations'))
+    body += render_values(
+        'users_admission', admission.stats(),
+        counters=('rejected', 'throttled', 'waits_refused'))
+    if db.has_replica():
+        body += render_values(
+            'users_db_replica', db.replica_stats(), counters=('failovers',))
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
 @users_blueprint.route('/users', methods=['GET'])
+@db.read_only
+@conditional
 def get_all_users():
-    """Get all users"""
+    """Get all users
+
+    Sin parámetros devuelve la lista completa. Con `limit` y/o `after`
+    pagina por `id` (keyset): cada página es una única consulta de rango
+    sobre la clave primaria y `next` es el cursor para la siguiente. Con
+    `ids` devuelve esos usuarios (ver `get_users_by_ids`).
+    """
+    if 'ids' in request.args:
+        return get_users_by_ids(request.args['ids'])
+    if 'limit' not in request.args and 'after' not in request.args:
+        response_object = {
+            'status': 'success',
+            'data': {
+                'users': [user_json(row) for row in user_rows()]
+            }
+        }
+        return json_response(response_object)
+    try:
+        limit = int(request.args.get(
+            'limit', current_app.config['USERS_PAGE_SIZE']))
+        after = _int_arg(request.args.get('after', 0), MAX_USER_ID)
+    except ValueError:
+        limit = after = -1
+    if limit < 1 or after < 0:
+        response_object = {
+            'status': 'falló',
+            'message': 'Parámetros de paginación inválidos.'
+        }
+        return jsonify(response_object), 400
+    limit = min(limit, current_app.config['USERS_PAGE_MAX_LIMIT'])
+    # se pide una fila extra para saber si hay otra página sin un COUNT
+    users = user_rows().filter(User.id > after).order_by(User.id) \
+        .limit(limit + 1).all()
+    next_cursor = users[limit - 1].id if len(users) > limit else None
     response_object = {
         'status': 'success',
         'data': {
-            'users': [user.to_json() for user in User.query.all()]
+            'users': [user_json(row) for row in users[:limit]],
+            'next': next_cursor
         }
     }
-    return jsonify(response_object), 200
+    return json_response(response_object)
+
+
+def get_users_by_ids(raw_ids):
+    """Obteniendo varios usuarios por id con una sola consulta `IN`
+
+    Los usuarios se devuelven en el orden pedido, sin repetidos, con el
+    mismo formato que `get_single_user`; los ids que no existen se listan
+    en `missing`.
+    """
+    response_object = {
+        'status': 'falló',
+        'message': 'Lista de ids inválida.'
+    }
+    try:
+        ids = list(dict.fromkeys(
+            _int_arg(user_id, MAX_USER_ID)
+            for user_id in raw_ids.split(',')))
+    except ValueError:
+        return jsonify(response_object), 400
+    max_size = current_app.config['USERS_BATCH_MAX_SIZE']
+    if len(ids) > max_size:
+        response_object['message'] = \
+            f'Se pueden pedir como máximo {max_size} ids.'
+        return jsonify(response_object), 400
+    found = {
+        row.id: row for row in user_rows().filter(User.id.in_(ids))
+    }
+    response_object = {
+        'status': 'success',
+        'data': {
+            'users': [user_json(found[user_id])
+                      for user_id in ids if user_id in found],
+            'missing': [user_id for user_id in ids if user_id not in found]
+        }
+    }
+    return json_response(response_object)
+
+
+@users_blueprint.route('/users/stats', methods=['GET'])
+@db.read_only
+@conditional(extra=database_date)
+def get_stats():
+    """Obteniendo el total de usuarios, activos, inactivos y altas por día
+
+    Los números salen de contadores que se actualizan en cada escritura,
+    sin recorrer `users`. `days` indica cuántos días de altas devolver.
+    """
+    config = current_app.config
+    try:
+        days = int(request.args.get('days', config['USERS_STATS_DAYS']))
+    except ValueError:
+        days = 0
+    if not 1 <= days <= config['USERS_STATS_MAX_DAYS']:
+        response_object = {
+            'status': 'falló',
+            'message': 'Parámetros inválidos.'
+        }
+        return jsonify(response_object), 400
+    response_object = {
+        'status': 'success',
+        'data': user_stats(days)
+    }
+    return json_response(response_object)
+
+
+@users_blueprint.route('/users/changes', methods=['GET'])
+def get_changes():
+    """Obteniendo los usuarios escritos después del cursor `since`
+
+    Sin `since` devuelve solo el cursor actual: el cliente lo guarda,
+    carga `GET /users` y desde ahí pide los cambios. Con `wait` (segundos)
+    espera a que haya cambios (long-poll) sin retener una conexión de la
+    base de datos entre consultas; si el worker ya tiene el máximo de
+    esperas responde enseguida. Un cursor ya depurado devuelve 410.
+    """
+    config = current_app.config
+    response_object = {
+        'status': 'falló',
+        'message': 'Parámetros inválidos.'
+    }
+    try:
+        since = _int_arg(request.args['since'], MAX_CURSOR) \
+            if 'since' in request.args else None
+        wait = float(request.args.get('wait', 0))
+        limit = min(int(request.args.get(
+            'limit', config['USERS_CHANGES_LIMIT'])),
+            config['USERS_CHANGES_LIMIT'])
+    except ValueError:
+        return jsonify(response_object), 400
+    if (since is not None and since < 0) or not math.isfinite(wait) or \
+            wait < 0 or limit < 1:
+        return jsonify(response_object), 400
+    wait = min(wait, config['USERS_CHANGES_MAX_WAIT'])
+    latest, pruned = user_changes_cursor()
+    if since is None:
+        return json_response({
+            'status': 'success',
+            'data': {'users': [], 'cursor': latest, 'more': False}
+        })
+    if since < pruned:
+        response_object['message'] = \
+            'El cursor expiró, vuelva a cargar los usuarios.'
+        return jsonify(response_object), 410
+    deadline = time.monotonic() + wait
+    rows = user_changes(since, limit)
+    if not rows and wait > 0:
+        # cada espera retiene un hilo: sin lugar se responde enseguida
+        with admission.long_poll() as waiting:
+            while waiting and not rows and time.monotonic() < deadline:
+                db.session.rollback()
+                time.sleep(config['USERS_CHANGES_POLL_INTERVAL'])
+                rows = user_changes(since, limit)
+    # un usuario escrito varias veces aparece una sola vez, en su último
+    # lugar: las filas ya traen su estado actual
+    users = {}
+    for row in rows:
+        users.pop(row.id, None)
+        users[row.id] = user_json(row)
+    response_object = {
+        'status': 'success',
+        'data': {
+            'users': list(users.values()),
+            'cursor': rows[-1].cursor if rows else since,
+            'more': len(rows) == limit
+        }
+    }
+    return json_response(response_object)
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(user_json(row)) + '\n'
+
+
+def _csv_header():
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(USER_PUBLIC_FIELDS)
+    return buffer.getvalue()
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+# tipo, cabecera (se envía antes de consultar) y serializador de filas
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', None, _ndjson_lines),
+    'csv': ('text/csv', _csv_header, _csv_lines),
+}
+
+
+@users_blueprint.route('/users/export', methods=['GET'])
+def export_users():
+    """Exportando todos los usuarios como NDJSON o CSV en streaming
+
+    Las filas se leen con un cursor del lado del servidor y se envían en
+    bloques de `USERS_EXPORT_CHUNK_SIZE`, así la memoria no depende del
+    tamaño de la tabla.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        response_object = {
+            'status': 'falló',
+            'message': 'Formato de exportación inválido.'
+        }
+        return jsonify(response_object), 400
+    mimetype, header, serialize = EXPORT_FORMATS[export_format]
+    chunk_size = current_app.config['USERS_EXPORT_CHUNK_SIZE']
+
+    def generate():
+        if header is not None:
+            yield header()
+        rows = user_rows().order_by(User.id).execution_options(
+            stream_results=True).yield_per(chunk_size)
+        chunk = []
+        for line in serialize(rows):
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename=users.{export_format}'
+    return response
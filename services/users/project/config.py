@@ -4,18 +4,103 @@
 import os  # nuevo
 
 
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+def replica_binds(name):
+    """Bind `replica` de Flask-SQLAlchemy si la variable `name` existe"""
+    url = os.environ.get(name)
+    return {'replica': url} if url else None
+
+
+def available_cpus():
+    """CPUs que puede usar este proceso (respeta la afinidad del contenedor)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
 class BaseConfig:
     """Configuración base"""
     TESTING = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_POOL_SIZE = env_int('SQLALCHEMY_POOL_SIZE', 5)
+    SQLALCHEMY_MAX_OVERFLOW = env_int('SQLALCHEMY_MAX_OVERFLOW', 5)
+    SQLALCHEMY_POOL_TIMEOUT = env_int('SQLALCHEMY_POOL_TIMEOUT', 10)
+    SQLALCHEMY_POOL_RECYCLE = env_int('SQLALCHEMY_POOL_RECYCLE', 1800)
+    SQLALCHEMY_POOL_PRE_PING = env_bool('SQLALCHEMY_POOL_PRE_PING', True)
+    # lecturas desde la réplica (ver project.database)
+    SQLALCHEMY_REPLICA_STICKY_SECONDS = env_int(
+        'SQLALCHEMY_REPLICA_STICKY_SECONDS', 5)
+    SQLALCHEMY_REPLICA_RETRY_SECONDS = env_int(
+        'SQLALCHEMY_REPLICA_RETRY_SECONDS', 30)
     SECRET_KEY = 'my_secretkey'
     DEBUG_TB_ENABLED = False  # nuevo
     DEBUG_TB_INTERCEPT_REDIRECTS = False  # nuevo
+    USERS_PAGE_SIZE = 100
+    USERS_PAGE_MAX_LIMIT = 1000
+    USERS_BATCH_MAX_SIZE = 500
+    USERS_CHANGES_LIMIT = 1000
+    USERS_CHANGES_MAX_WAIT = 25
+    USERS_CHANGES_POLL_INTERVAL = 0.5
+    USERS_CHANGES_RETENTION_DAYS = 7
+    USERS_STATS_DAYS = 30
+    USERS_STATS_MAX_DAYS = 366
+    USERS_EXPORT_CHUNK_SIZE = 1000
+    # cada alta cuesta un hash bcrypt (~0,3 s con 12 rondas): el lote debe
+    # terminar dentro de GUNICORN_TIMEOUT aun con un solo núcleo
+    USERS_BULK_MAX_SIZE = env_int('USERS_BULK_MAX_SIZE', 50)
+    USERS_UPDATE_MAX_IDS = 5000
+    USERS_BULK_CHUNK_SIZE = 1000
+    USERS_SEARCH_LIMIT = 20
+    USERS_SEARCH_MAX_LIMIT = 100
+    USERS_SEARCH_CONTAINS_MIN_LENGTH = 3
+    USERS_INDEX_PAGE_SIZE = 50
+    USERS_INDEX_CACHE_SIZE = 256
+    # compresión de respuestas (ver project.api.compression)
+    COMPRESS_MIN_SIZE = env_int('COMPRESS_MIN_SIZE', 500)
+    COMPRESS_LEVEL = env_int('COMPRESS_LEVEL', 6)
+    COMPRESS_BROTLI_QUALITY = env_int('COMPRESS_BROTLI_QUALITY', 4)
+    # control de admisión de escrituras (ver project.api.admission)
+    USERS_WRITE_MAX_INFLIGHT = env_int('USERS_WRITE_MAX_INFLIGHT', 2)
+    USERS_WRITE_RATE = float(os.environ.get('USERS_WRITE_RATE', 5))
+    USERS_WRITE_BURST = env_int('USERS_WRITE_BURST', 10)
+    USERS_WRITE_MAX_CLIENTS = 10000
+    # proxies de confianza delante de la app (X-Forwarded-For); 0 si no hay
+    PROXY_FIX_X_FOR = env_int('PROXY_FIX_X_FOR', 0)
+    USERS_CACHE_BACKEND = os.environ.get(
+        'USERS_CACHE_BACKEND', 'project.api.cache.MemoryCache')
+    USERS_CACHE_SIZE = env_int('USERS_CACHE_SIZE', 10000)
+    USERS_CACHE_TTL = env_int('USERS_CACHE_TTL', 60)
+    BCRYPT_LOG_ROUNDS = 12
+    BCRYPT_POOL_SIZE = env_int('BCRYPT_POOL_SIZE', available_cpus())
+    BCRYPT_POOL_QUEUE_SIZE = env_int('BCRYPT_POOL_QUEUE_SIZE', 32)
+    BCRYPT_POOL_TIMEOUT = float(os.environ.get('BCRYPT_POOL_TIMEOUT', 5))
+    # gunicorn.conf.py; 0 workers significa 2 * CPUs + 1
+    GUNICORN_WORKERS = env_int('GUNICORN_WORKERS', 0)
+    GUNICORN_WORKER_CLASS = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+    GUNICORN_THREADS = env_int('GUNICORN_THREADS', 1)
+    # esperas de long-poll por worker: cada una retiene un hilo
+    USERS_CHANGES_MAX_WAITERS = env_int(
+        'USERS_CHANGES_MAX_WAITERS', GUNICORN_THREADS // 2)
+    GUNICORN_PRELOAD = env_bool('GUNICORN_PRELOAD', True)
+    GUNICORN_MAX_REQUESTS = env_int('GUNICORN_MAX_REQUESTS', 1000)
+    GUNICORN_MAX_REQUESTS_JITTER = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+    GUNICORN_TIMEOUT = env_int('GUNICORN_TIMEOUT', 30)
 
 
 class DevelopmentConfig(BaseConfig):
     """Configuración de desarrollo"""
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    SQLALCHEMY_BINDS = replica_binds('DATABASE_REPLICA_URL')
+    SQLALCHEMY_POOL_SIZE = env_int('SQLALCHEMY_POOL_SIZE', 2)
+    SQLALCHEMY_MAX_OVERFLOW = env_int('SQLALCHEMY_MAX_OVERFLOW', 2)
     DEBUG_TB_ENABLED = True
 
 
@@ -23,8 +108,27 @@ class TestingConfig(BaseConfig):
     """Configuración de prueba"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_TEST_URL')
+    SQLALCHEMY_POOL_SIZE = env_int('SQLALCHEMY_POOL_SIZE', 1)
+    SQLALCHEMY_MAX_OVERFLOW = env_int('SQLALCHEMY_MAX_OVERFLOW', 2)
+    SQLALCHEMY_POOL_PRE_PING = env_bool('SQLALCHEMY_POOL_PRE_PING', False)
+    BCRYPT_LOG_ROUNDS = 4
+    BCRYPT_POOL_SIZE = 0
+    USERS_WRITE_MAX_INFLIGHT = 0
+    USERS_WRITE_RATE = 0
+    USERS_CHANGES_POLL_INTERVAL = 0.01
+    USERS_CHANGES_MAX_WAITERS = 1
 
 
 class ProductionConfig(BaseConfig):
     """Configuración de producción"""
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    SQLALCHEMY_BINDS = replica_binds('DATABASE_REPLICA_URL')
+    SQLALCHEMY_POOL_SIZE = env_int('SQLALCHEMY_POOL_SIZE', 10)
+    SQLALCHEMY_MAX_OVERFLOW = env_int('SQLALCHEMY_MAX_OVERFLOW', 10)
+    SQLALCHEMY_POOL_TIMEOUT = env_int('SQLALCHEMY_POOL_TIMEOUT', 5)
+    GUNICORN_WORKER_CLASS = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+    GUNICORN_THREADS = env_int('GUNICORN_THREADS', 4)
+    USERS_CHANGES_MAX_WAITERS = env_int(
+        'USERS_CHANGES_MAX_WAITERS', GUNICORN_THREADS // 2)
+    # nginx (services/nginx/prod.conf) envía X-Forwarded-For
+    PROXY_FIX_X_FOR = env_int('PROXY_FIX_X_FOR', 1)
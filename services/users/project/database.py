@@ -0,0 +1,284 @@
+# services/users/project/database.py
+
+
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy import (
+    SQLAlchemy as _SQLAlchemy, SignallingSession, get_state
+)
+from sqlalchemy import event, exc, inspect, orm, text
+from sqlalchemy.pool import QueuePool
+
+
+REPLICA_BIND = 'replica'
+PRIMARY_COOKIE = 'db_primary_until'
+
+
+class PoolStats:
+    """Contadores de un pool de conexiones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.invalidations = 0
+
+    def record_checkout(self, seconds, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def record_invalidation(self, *args):
+        with self._lock:
+            self.invalidations += 1
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide la espera por una conexión y las invalidaciones"""
+
+    def __init__(self, *args, **kwargs):
+        first = '_dispatch' not in kwargs
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        if first:
+            # `recreate` copia los listeners junto con `_dispatch`
+            event.listen(self, 'invalidate', self._record_invalidation)
+
+    def _record_invalidation(self, *args):
+        self.stats.record_invalidation()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.stats.record_checkout(
+                time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def pool_stats(engine):
+    """Devuelve el estado del pool de `engine` y sus contadores."""
+    pool = engine.pool
+    data = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        data.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+        })
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        data.update({
+            'checkouts': stats.checkouts,
+            'checkout_wait_seconds': round(stats.wait_seconds, 6),
+            'checkout_wait_max_seconds': round(stats.max_wait_seconds, 6),
+            'checkout_timeouts': stats.timeouts,
+            'invalidations': stats.invalidations,
+        })
+    return data
+
+
+UNUSED_INDEXES = text("""
+    SELECT s.relname, s.indexrelname, s.idx_scan,
+           pg_relation_size(s.indexrelid) AS size
+    FROM pg_stat_user_indexes s JOIN pg_index i USING (indexrelid)
+    WHERE s.idx_scan = 0 AND NOT i.indisunique AND NOT i.indisprimary
+    ORDER BY size DESC
+""")
+
+# la reflexión de SQLAlchemy omite los índices de expresión: se leen del
+# catálogo (en PostgreSQL solo cuentan los válidos)
+INDEX_NAMES = {
+    'postgresql': text("""
+        SELECT c.relname FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        WHERE t.relname = :table AND i.indisvalid
+          AND pg_table_is_visible(t.oid)
+    """),
+    'sqlite': text("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = :table
+    """),
+}
+
+
+def _index_names(engine, inspector, table):
+    query = INDEX_NAMES.get(engine.dialect.name)
+    if query is None:
+        return {index['name'] for index in inspector.get_indexes(table)}
+    with engine.connect() as connection:
+        return {row[0] for row in connection.execute(query, table=table)}
+
+
+def index_report(engine, metadata):
+    """Compara los índices de `metadata` con el esquema de `engine`
+
+    Además de `table.indexes` se esperan los que devuelva
+    `table.info['dialect_indexes'](motor)` como pares `(nombre, DDL)`.
+    Devuelve los índices declarados que faltan como `(tabla, índice)` y,
+    solo en PostgreSQL, los que no se han usado desde el último reinicio
+    de estadísticas como `(tabla, índice, bytes)`; en otros motores la
+    segunda lista es `None`.
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in metadata.sorted_tables:
+        live = set()
+        if table.name in tables:
+            live = _index_names(engine, inspector, table.name)
+        names = [index.name for index in table.indexes]
+        dialect_indexes = table.info.get('dialect_indexes')
+        if dialect_indexes is not None:
+            names.extend(name for name, _ in
+                         dialect_indexes(engine.dialect.name))
+        missing.extend((table.name, name) for name in sorted(names)
+                       if name not in live)
+    unused = None
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as connection:
+            unused = [(row.relname, row.indexrelname, row.size)
+                      for row in connection.execute(UNUSED_INDEXES)]
+    return missing, unused
+
+
+class RoutingSession(SignallingSession):
+    """Sesión que envía las lecturas de las vistas `read_only` a la réplica
+
+    Los flush (escrituras del ORM) siempre usan el primario.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        if has_request_context() and g.get('db_bind') and \
+                not self._flushing:
+            return get_state(self.app).db.get_engine(
+                self.app, bind=g.db_bind)
+        return super().get_bind(mapper, clause)
+
+
+class _ReplicaState:
+
+    def __init__(self):
+        self.down_until = 0.0
+        self.failovers = 0
+
+
+class SQLAlchemy(_SQLAlchemy):
+    """Flask-SQLAlchemy con pre-ping, un pool instrumentado y réplica
+
+    `SQLALCHEMY_POOL_SIZE`, `SQLALCHEMY_MAX_OVERFLOW` y
+    `SQLALCHEMY_POOL_TIMEOUT` solo se aplican a bases de datos servidor;
+    SQLite mantiene el pool que elige Flask-SQLAlchemy.
+
+    Si `SQLALCHEMY_BINDS` define el bind `replica`, las vistas marcadas
+    con `db.read_only` leen de ella. Un cliente que escribió lee del
+    primario durante `SQLALCHEMY_REPLICA_STICKY_SECONDS` (cookie), y si la
+    réplica falla se usa el primario durante
+    `SQLALCHEMY_REPLICA_RETRY_SECONDS`.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('SQLALCHEMY_POOL_PRE_PING', False)
+        app.config.setdefault('SQLALCHEMY_REPLICA_STICKY_SECONDS', 5)
+        app.config.setdefault('SQLALCHEMY_REPLICA_RETRY_SECONDS', 30)
+        super().init_app(app)
+        app.extensions['db_replica'] = _ReplicaState()
+        app.after_request(self._stick_to_primary)
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def apply_pool_defaults(self, app, options):
+        super().apply_pool_defaults(app, options)
+        options['pool_pre_ping'] = app.config['SQLALCHEMY_POOL_PRE_PING']
+
+    def apply_driver_hacks(self, app, info, options):
+        if info.drivername.startswith('sqlite'):
+            for key in ('pool_size', 'max_overflow', 'pool_timeout'):
+                options.pop(key, None)
+        super().apply_driver_hacks(app, info, options)
+        options.setdefault('poolclass', InstrumentedQueuePool)
+
+    def has_replica(self, app=None):
+        app = self.get_app(app)
+        return REPLICA_BIND in (app.config['SQLALCHEMY_BINDS'] or {})
+
+    def replica_stats(self):
+        state = current_app.extensions['db_replica']
+        return {
+            'down': state.down_until > time.monotonic(),
+            'failovers': state.failovers,
+        }
+
+    def reading_replica(self):
+        """Indica si la petición actual está leyendo de la réplica."""
+        return has_request_context() and g.get('db_bind') == REPLICA_BIND
+
+    def record_write(self):
+        """Marca que la petición actual escribió en el primario."""
+        if has_request_context():
+            g.db_wrote = True
+
+    def _use_replica(self):
+        if not self.has_replica():
+            return False
+        if current_app.extensions['db_replica'].down_until > \
+                time.monotonic():
+            return False
+        try:
+            sticky_until = float(request.cookies.get(PRIMARY_COOKIE, 0))
+        except ValueError:
+            sticky_until = 0
+        return sticky_until < time.time()
+
+    def _stick_to_primary(self, response):
+        if g.get('db_wrote') and self.has_replica():
+            seconds = current_app.config['SQLALCHEMY_REPLICA_STICKY_SECONDS']
+            response.set_cookie(
+                PRIMARY_COOKIE, str(time.time() + seconds), max_age=seconds,
+                httponly=True)
+        return response
+
+    def read_only(self, view):
+        """Decorador de vistas de solo lectura que pueden usar la réplica
+
+        Si la réplica no responde se marca caída y la vista se vuelve a
+        ejecutar contra el primario.
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self._use_replica():
+                return view(*args, **kwargs)
+            g.db_bind = REPLICA_BIND
+            try:
+                return view(*args, **kwargs)
+            except exc.OperationalError:
+                self.session.rollback()
+                state = current_app.extensions['db_replica']
+                state.down_until = time.monotonic() + \
+                    current_app.config['SQLALCHEMY_REPLICA_RETRY_SECONDS']
+                state.failovers += 1
+                current_app.logger.warning(
+                    'Réplica no disponible, leyendo del primario')
+            finally:
+                g.db_bind = None
+            return view(*args, **kwargs)
+        return wrapper
@@ -2,22 +2,75 @@
 
 
 from flask_testing import TestCase
+from sqlalchemy import event
 
-from project import create_app, db
+from project import create_app, db, user_cache
 
 
 app = create_app()
 
 
+def _sqlite_savepoints(engine):
+    # pysqlite maneja sus propias transacciones y rompe los SAVEPOINT:
+    # se desactiva y SQLAlchemy emite el BEGIN
+    @event.listens_for(engine, 'connect')
+    def connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def begin(connection):
+        connection.execute('BEGIN')
+
+
 class BaseTestCase(TestCase):
+    """Test con el esquema creado una vez por proceso
+
+    Cada test corre dentro de una transacción que se deshace al final. La
+    sesión trabaja sobre un SAVEPOINT que se reabre después de cada
+    commit o rollback, así el código probado puede confirmar y deshacer
+    sin salir de la transacción del test.
+    """
+
+    schema_created = False
+
     def create_app(self):
         app.config.from_object('project.config.TestingConfig')
         return app
 
     def setUp(self):
-        db.create_all()
-        db.session.commit()
+        engine = db.get_engine()
+        if not BaseTestCase.schema_created:
+            if engine.dialect.name == 'sqlite':
+                engine.dispose()
+                _sqlite_savepoints(engine)
+            db.drop_all()
+            db.create_all()
+            BaseTestCase.schema_created = True
+        self.connection = engine.connect()
+        self.transaction = self.connection.begin()
+        self.session = db.session
+        db.session = db.create_scoped_session(
+            options={'bind': self.connection, 'binds': {}})
+        # Flask-SQLAlchemy quita la sesión al final de cada petición
+        db.session.remove = db.session.expire_all
+        db.session.begin_nested()
+        event.listen(
+            db.session, 'after_transaction_end', self._restart_savepoint)
+
+    @staticmethod
+    def _restart_savepoint(session, transaction):
+        if transaction.nested and not transaction._parent.nested:
+            session.expire_all()
+            session.begin_nested()
 
     def tearDown(self):
-        db.session.remove()
-        db.drop_all()
+        # sin el listener, cerrar la sesión no reabre el SAVEPOINT
+        event.remove(
+            db.session, 'after_transaction_end', self._restart_savepoint)
+        db.session.close()
+        self.transaction.rollback()
+        self.connection.close()
+        db.session = self.session
+        user_cache.clear()
+        self.app.extensions['users_index_cache'].clear()
+        self.app.extensions['compression_cache'].clear()
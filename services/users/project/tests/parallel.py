@@ -0,0 +1,83 @@
+# services/users/project/tests/parallel.py
+
+
+import copy
+import fnmatch
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine.url import make_url
+
+
+def worker_database_url(url, index):
+    """Devuelve la base de datos propia del worker `index`
+
+    SQLite en memoria ya es propia de cada proceso; un archivo SQLite o una
+    base PostgreSQL reciben el sufijo `_w<index>`. La base PostgreSQL se
+    crea si todavía no existe.
+    """
+    info = make_url(url)
+    if not info.database or info.database == ':memory:':
+        return url
+    if info.drivername.startswith('sqlite'):
+        root, extension = os.path.splitext(info.database)
+        info.database = f'{root}_w{index}{extension}'
+        return str(info)
+    name = f'{info.database}_w{index}'
+    admin_url = copy.copy(info)
+    admin_url.database = 'postgres'
+    admin = create_engine(admin_url, isolation_level='AUTOCOMMIT')
+    try:
+        with admin.connect() as connection:
+            exists = connection.execute(
+                'SELECT 1 FROM pg_database WHERE datname = %s',
+                (name,)).scalar()
+            if not exists:
+                connection.execute(f'CREATE DATABASE "{name}"')
+    finally:
+        admin.dispose()
+    info.database = name
+    return str(info)
+
+
+def split_modules(modules, workers):
+    """Reparte los módulos por tamaño (aprox. duración) entre los workers."""
+    buckets = [[] for _ in range(workers)]
+    sizes = [0] * workers
+    for path, module in sorted(
+            modules, key=lambda item: -os.path.getsize(item[0])):
+        index = sizes.index(min(sizes))
+        buckets[index].append(module)
+        sizes[index] += os.path.getsize(path)
+    return [bucket for bucket in buckets if bucket]
+
+
+def run_parallel(start_dir, pattern, workers):
+    """Ejecuta los módulos de test en `workers` procesos, cada uno con su
+    propia base de datos. Devuelve 0 si todos pasan."""
+    modules = [
+        (os.path.join(start_dir, name),
+         os.path.join(start_dir, name)[:-3].replace(os.sep, '.'))
+        for name in sorted(os.listdir(start_dir))
+        if fnmatch.fnmatch(name, pattern)
+    ]
+    url = os.environ['DATABASE_TEST_URL']
+
+    def run(indexed_bucket):
+        index, bucket = indexed_bucket
+        env = dict(os.environ,
+                   DATABASE_TEST_URL=worker_database_url(url, index))
+        return subprocess.run(
+            [sys.executable, '-m', 'unittest', *bucket], env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+    buckets = split_modules(modules, workers)
+    with ThreadPoolExecutor(len(buckets)) as executor:
+        results = list(executor.map(run, enumerate(buckets)))
+    for bucket, result in zip(buckets, results):
+        print(f'== {" ".join(bucket)}')
+        print(result.stdout.decode())
+    return 0 if all(result.returncode == 0 for result in results) else 1
@@ -0,0 +1,102 @@
+# services/users/project/tests/test_admission.py
+
+
+import json
+import os
+import unittest
+from unittest import mock
+
+from flask_testing import TestCase
+
+from project import admission, create_app
+from project.api.admission import TokenBucket
+from project.tests.base import BaseTestCase
+
+
+def post_user(client, number):
+    return client.post(
+        '/users',
+        data=json.dumps({
+            'username': f'user{number}',
+            'email': f'user{number}@upeu.edu.pe',
+            'password': 'greaterthaneight'
+        }),
+        content_type='application/json',
+    )
+
+
+class TestAdmission(BaseTestCase):
+    """Test del control de admisión de escrituras"""
+
+    def setUp(self):
+        super().setUp()
+        admission.reset()
+
+    def tearDown(self):
+        admission.reset()
+        super().tearDown()
+
+    def test_token_bucket(self):
+        """Asegurando que la cubeta se vacía y calcula la espera"""
+        bucket = TokenBucket(2)
+        self.assertEqual(bucket.take(1, 2), 0)
+        self.assertEqual(bucket.take(1, 2), 0)
+        self.assertGreater(bucket.take(1, 2), 0.9)
+
+    def test_client_throttled(self):
+        """Asegurando que un cliente que excede su cubeta recibe 429"""
+        self.app.config['USERS_WRITE_RATE'] = 0.1
+        self.app.config['USERS_WRITE_BURST'] = 2
+        for number in range(2):
+            self.assertEqual(post_user(self.client, number).status_code, 201)
+        response = post_user(self.client, 2)
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '10')
+        self.assertIn('falló', data['status'])
+        self.assertEqual(admission.stats()['throttled'], 1)
+        # las lecturas no consumen tokens
+        self.assertEqual(self.client.get('/users').status_code, 200)
+
+    def test_inflight_limit(self):
+        """Asegurando que se rechaza con 503 al superar las escrituras en
+        curso del worker"""
+        self.app.config['USERS_WRITE_MAX_INFLIGHT'] = 1
+        self.app.extensions['admission'].inflight = 1
+        response = post_user(self.client, 0)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(self.client.get('/users/ping').status_code, 200)
+        self.app.extensions['admission'].inflight = 0
+        self.assertEqual(post_user(self.client, 0).status_code, 201)
+        self.assertEqual(admission.stats()['inflight'], 0)
+
+
+class TestAdmissionBehindProxy(TestCase):
+    """Test del control de admisión detrás de nginx"""
+
+    def create_app(self):
+        settings = {'APP_SETTINGS': 'project.config.ProductionConfig'}
+        with mock.patch.dict(os.environ, settings):
+            app = create_app()
+        app.config.from_object('project.config.TestingConfig')
+        app.config['USERS_WRITE_RATE'] = 0.1
+        app.config['USERS_WRITE_BURST'] = 1
+        return app
+
+    def post(self, client_address):
+        # una carga vacía pasa la admisión sin escribir en la base
+        return self.client.post(
+            '/users', data=json.dumps({}), content_type='application/json',
+            headers={'X-Forwarded-For': client_address})
+
+    def test_bucket_per_forwarded_client(self):
+        """Asegurando que cada cliente detrás del proxy tiene su cubeta"""
+        self.assertEqual(self.post('10.0.0.1').status_code, 400)
+        self.assertEqual(self.post('10.0.0.1').status_code, 429)
+        self.assertEqual(self.post('10.0.0.2').status_code, 400)
+        self.assertEqual(admission.stats()['clients'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+# services/users/project/tests/test_cache.py
+
+
+import json
+import time
+import unittest
+
+from project import db
+from project.api.cache import MemoryCache
+from project.api.models import CollectionVersion, User
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user
+
+
+class TestMemoryCache(unittest.TestCase):
+    """Test para el backend de caché en memoria."""
+
+    def test_lru_eviction(self):
+        """Asegurando que se expulse la entrada menos usada."""
+        cache = MemoryCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl_expiration(self):
+        """Asegurando que las entradas expiren tras el TTL."""
+        cache = MemoryCache(maxsize=2, ttl=0.01)
+        cache.set('a', 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class TestUserCache(BaseTestCase):
+    """Test para la caché de usuarios."""
+
+    def get_stats(self):
+        response = self.client.get('/users/cache/stats')
+        return json.loads(response.data.decode())['data']
+
+    def test_single_user_cached(self):
+        """Asegurando que la segunda lectura de un usuario sea un acierto."""
+        user = add_user(
+            'sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        self.client.get(f'/users/{user.id}')
+        response = self.client.get(f'/users/{user.id}')
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('sindy', data['data']['username'])
+        stats = self.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_single_user_invalidated_on_update(self):
+        """Asegurando que una actualización invalide el usuario cacheado."""
+        user = add_user(
+            'sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        self.client.get(f'/users/{user.id}')
+        user.username = 'sindy2'
+        db.session.commit()
+        response = self.client.get(f'/users/{user.id}')
+        data = json.loads(response.data.decode())
+        self.assertIn('sindy2', data['data']['username'])
+        self.assertEqual(self.get_stats()['misses'], 2)
+
+    def test_single_user_stale_version(self):
+        """Asegurando que una escritura de otro worker (sin invalidar esta
+        caché) no sirva el usuario cacheado con el ETag nuevo."""
+        user = add_user(
+            'sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        user_id = user.id
+        first = self.client.get(f'/users/{user_id}')
+        db.session.execute(User.__table__.update().values(active=False))
+        versions = CollectionVersion.__table__
+        db.session.execute(
+            versions.update().where(versions.c.name == 'users')
+            .values(version=versions.c.version + 1))
+        db.session.commit()
+        response = self.client.get(
+            f'/users/{user_id}',
+            headers={'If-None-Match': first.headers['ETag']})
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(data['data']['active'])
+        self.assertEqual(self.get_stats()['misses'], 2)
+
+    def test_single_user_not_invalidated_on_rollback(self):
+        """Asegurando que un rollback no invalide la caché."""
+        user = add_user(
+            'sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        self.client.get(f'/users/{user.id}')
+        user.username = 'sindy2'
+        db.session.flush()
+        db.session.rollback()
+        response = self.client.get(f'/users/{user.id}')
+        data = json.loads(response.data.decode())
+        self.assertIn('sindy', data['data']['username'])
+        self.assertEqual(self.get_stats()['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+# services/users/project/tests/test_changes.py
+
+
+import json
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from project import admission, db
+from project.api.models import prune_user_changes, users_version
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user
+
+
+class TestUserChanges(BaseTestCase):
+    """Test del feed de cambios de usuarios"""
+
+    def changes(self, query):
+        response = self.client.get(f'/users/changes?{query}')
+        return response, json.loads(response.data.decode())
+
+    def test_changes_since_cursor(self):
+        """Asegurando que el feed devuelve solo los usuarios escritos
+        después del cursor, en orden."""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        _, data = self.changes('')
+        cursor = data['data']['cursor']
+        self.assertEqual(data['data']['users'], [])
+        self.client.post(
+            '/users',
+            data=json.dumps({
+                'username': 'raquel',
+                'email': 'raquel@gmail.com',
+                'password': 'greaterthaneight'
+            }),
+            content_type='application/json',
+        )
+        self.client.post(
+            '/users/bulk',
+            data=json.dumps([{
+                'username': 'ana',
+                'email': 'ana@upeu.edu.pe',
+                'password': 'greaterthaneight'
+            }]),
+            content_type='application/json',
+        )
+        response, data = self.changes(f'since={cursor}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [user['username'] for user in data['data']['users']],
+            ['raquel', 'ana'])
+        self.assertGreater(data['data']['cursor'], cursor)
+        self.assertFalse(data['data']['more'])
+        _, data = self.changes(f'since={data["data"]["cursor"]}')
+        self.assertEqual(data['data']['users'], [])
+
+    def test_changes_updates(self):
+        """Asegurando que una actualización aparece una vez con el estado
+        actual del usuario."""
+        user = add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'password')
+        _, data = self.changes('since=0')
+        self.assertTrue(data['data']['users'][0]['active'])
+        user.active = False
+        db.session.commit()
+        _, data = self.changes('since=0')
+        self.assertEqual(len(data['data']['users']), 1)
+        self.assertFalse(data['data']['users'][0]['active'])
+        _, data = self.changes('since=0&limit=1')
+        self.assertTrue(data['data']['more'])
+
+    def test_unchanged_assignment_not_recorded(self):
+        """Asegurando que asignar el mismo valor no registra un cambio"""
+        user = add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'password')
+        version = users_version()
+        _, before = self.changes('')
+        # con el valor cargado el ORM sabe que no cambió
+        user.username = user.username
+        db.session.commit()
+        _, after = self.changes('')
+        self.assertEqual(users_version(), version)
+        self.assertEqual(after['data']['cursor'], before['data']['cursor'])
+
+    def test_changes_long_poll(self):
+        """Asegurando que `wait` espera antes de responder sin cambios"""
+        start = time.monotonic()
+        response, data = self.changes('since=0&wait=0.05')
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['data']['users'], [])
+        self.assertEqual(data['data']['cursor'], 0)
+
+    def test_changes_long_poll_capped(self):
+        """Asegurando que sin lugar para esperar se responde enseguida"""
+        admission.reset()
+        self.addCleanup(admission.reset)
+        self.app.config['USERS_CHANGES_MAX_WAITERS'] = 0
+        start = time.monotonic()
+        response, data = self.changes('since=0&wait=5')
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['data']['users'], [])
+        self.assertEqual(admission.stats()['waits_refused'], 1)
+
+    def test_changes_pruned_cursor(self):
+        """Asegurando que un cursor depurado devuelve 410"""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        self.assertEqual(
+            prune_user_changes(datetime.utcnow() + timedelta(days=1)), 1)
+        response, data = self.changes('since=0')
+        self.assertEqual(response.status_code, 410)
+        self.assertIn('expiró', data['message'])
+        _, data = self.changes('')
+        response, data = self.changes(f'since={data["data"]["cursor"]}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_changes_invalid(self):
+        """Asegurando que se produce un error con parámetros inválidos"""
+        for query in ('since=a', 'since=-1', 'since=0&wait=a',
+                      'since=99999999999999999999999',
+                      'since=0&wait=nan', 'since=0&wait=inf',
+                      'since=0&limit=0'):
+            response, data = self.changes(query)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('falló', data['status'])
+
+
+if __name__ == '__main__':
+    unittest.main()
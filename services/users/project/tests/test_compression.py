@@ -0,0 +1,86 @@
+# services/users/project/tests/test_compression.py
+
+
+import gzip
+import unittest
+
+from project.api import compression
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user
+
+
+class TestCompression(BaseTestCase):
+    """Test de la compresión negociada de respuestas"""
+
+    def setUp(self):
+        super().setUp()
+        for number in range(20):
+            add_user(f'user{number}', f'user{number}@upeu.edu.pe', 'x')
+
+    def get(self, url, encoding='gzip', **headers):
+        return self.client.get(
+            url, headers=dict(headers, **{'Accept-Encoding': encoding}))
+
+    def test_gzip_json(self):
+        """Asegurando que una respuesta JSON grande se comprime con gzip"""
+        plain = self.client.get('/users')
+        response = self.get('/users')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertLess(len(response.data), len(plain.data))
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertEqual(
+            response.headers['ETag'], plain.headers['ETag'][:-1] + '-gzip"')
+
+    def test_compressed_etag(self):
+        """Asegurando que el ETag comprimido se cachea y produce 304"""
+        first = self.get('/users')
+        self.assertEqual(len(self.app.extensions['compression_cache']), 1)
+        second = self.get('/users')
+        self.assertEqual(second.data, first.data)
+        response = self.get(
+            '/users', **{'If-None-Match': first.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_small_or_not_accepted(self):
+        """Asegurando que no se comprimen cuerpos chicos ni sin
+        `Accept-Encoding`"""
+        response = self.get('/users/1')
+        self.assertNotIn('Content-Encoding', response.headers)
+        response = self.client.get('/users')
+        self.assertNotIn('Content-Encoding', response.headers)
+        response = self.get('/users', encoding='identity')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_streamed_response(self):
+        """Asegurando que las respuestas en streaming se comprimen por
+        bloques"""
+        plain = self.client.get('/users/export')
+        response = self.get('/users/export')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+
+    def test_streamed_page_cached(self):
+        """Asegurando que la página principal comprimida se cachea con su
+        ETag"""
+        first = self.get('/')
+        self.assertEqual(first.headers['Content-Encoding'], 'gzip')
+        self.assertIn(b'user19', gzip.decompress(first.data))
+        self.assertEqual(len(self.app.extensions['compression_cache']), 1)
+        second = self.get('/')
+        self.assertEqual(second.data, first.data)
+
+    def test_brotli(self):
+        """Asegurando que se negocia brotli según `Accept-Encoding`"""
+        plain = self.client.get('/users')
+        response = self.get('/users', encoding='gzip, br')
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(
+            compression.brotli.decompress(response.data), plain.data)
+        response = self.get('/users', encoding='br;q=0.5, gzip')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+
+
+if __name__ == '__main__':
+    unittest.main()
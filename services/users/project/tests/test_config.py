@@ -52,6 +52,13 @@ class TestProductionConfig(TestCase):
         self.assertTrue(app.config['SECRET_KEY'] == 'my_secretkey')
         self.assertFalse(app.config['TESTING'])
         self.assertFalse(app.config['DEBUG_TB_ENABLED'])  # nuevo
+        self.assertTrue(app.config['SQLALCHEMY_POOL_PRE_PING'])
+        self.assertGreater(app.config['SQLALCHEMY_POOL_SIZE'], 0)
+        self.assertGreater(app.config['SQLALCHEMY_POOL_RECYCLE'], 0)
+        self.assertIn(
+            app.config['GUNICORN_WORKER_CLASS'], ('sync', 'gthread', 'gevent'))
+        self.assertTrue(app.config['GUNICORN_PRELOAD'])
+        self.assertGreater(app.config['GUNICORN_MAX_REQUESTS'], 0)
 
 
 if __name__ == '__main__':
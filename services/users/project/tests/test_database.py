@@ -0,0 +1,93 @@
+# services/users/project/tests/test_database.py
+
+
+import json
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy import exc
+
+from project import db
+from project.api import models  # noqa: F401
+from project.database import InstrumentedQueuePool, index_report, pool_stats
+from project.tests.base import BaseTestCase
+
+
+class TestInstrumentedQueuePool(unittest.TestCase):
+    """Test para el pool de conexiones instrumentado."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.engine = create_engine(
+            f'sqlite:///{self.path}', poolclass=InstrumentedQueuePool,
+            pool_size=1, max_overflow=0, pool_timeout=0.05,
+            connect_args={'check_same_thread': False})
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def test_checkout_stats(self):
+        """Asegurando que se cuenten las conexiones en uso y las esperas."""
+        connection = self.engine.connect()
+        stats = pool_stats(self.engine)
+        self.assertEqual(stats['pool'], 'InstrumentedQueuePool')
+        self.assertEqual(stats['checked_out'], 1)
+        self.assertEqual(stats['checkouts'], 1)
+        self.assertRaises(exc.TimeoutError, self.engine.connect)
+        stats = pool_stats(self.engine)
+        self.assertEqual(stats['checkout_timeouts'], 1)
+        self.assertGreaterEqual(stats['checkout_wait_max_seconds'], 0.05)
+        connection.invalidate()
+        connection.close()
+        stats = pool_stats(self.engine)
+        self.assertEqual(stats['checked_out'], 0)
+        self.assertEqual(stats['invalidations'], 1)
+
+
+class TestIndexReport(unittest.TestCase):
+    """Test para la revisión de índices contra el esquema."""
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        db.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_no_missing_indexes(self):
+        """Asegurando que un esquema completo no informe faltantes."""
+        missing, unused = index_report(self.engine, db.metadata)
+        self.assertEqual(missing, [])
+        self.assertIsNone(unused)
+
+    def test_missing_index(self):
+        """Asegurando que se informen los índices declarados que faltan."""
+        self.engine.execute('DROP INDEX ix_users_active_id')
+        missing, _ = index_report(self.engine, db.metadata)
+        self.assertEqual(missing, [('users', 'ix_users_active_id')])
+
+    def test_missing_dialect_index(self):
+        """Asegurando que se informen los índices de búsqueda que faltan."""
+        self.engine.execute('DROP INDEX ix_users_email_lower')
+        missing, _ = index_report(self.engine, db.metadata)
+        self.assertEqual(missing, [('users', 'ix_users_email_lower')])
+
+
+class TestPoolStatsRoute(BaseTestCase):
+    """Test para la ruta de estado del pool."""
+
+    def test_pool_stats(self):
+        """Asegurando que la ruta /users/pool/stats funcione."""
+        response = self.client.get('/users/pool/stats')
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('success', data['status'])
+        self.assertIn('pool', data['data'])
+
+
+if __name__ == '__main__':
+    unittest.main()
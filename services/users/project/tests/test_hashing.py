@@ -0,0 +1,71 @@
+# services/users/project/tests/test_hashing.py
+
+
+import json
+import unittest
+
+import bcrypt
+from flask import current_app
+
+from project import hasher
+from project.api.hashing import HashingQueueFull
+from project.tests.base import BaseTestCase
+
+
+class TestPasswordHasher(BaseTestCase):
+    """Test para el servicio de hashing."""
+
+    def tearDown(self):
+        hasher.shutdown()
+        super().tearDown()
+
+    def test_hash_inline(self):
+        """Asegurando que sin pool el hash se calcule en el proceso."""
+        hashed = hasher.hash('greaterthaneight')
+        self.assertTrue(bcrypt.checkpw(b'greaterthaneight', hashed.encode()))
+
+    def test_hash_pool(self):
+        """Asegurando que el pool de procesos genere hashes válidos."""
+        current_app.config['BCRYPT_POOL_SIZE'] = 2
+        hashed = hasher.hash('greaterthaneight')
+        self.assertTrue(bcrypt.checkpw(b'greaterthaneight', hashed.encode()))
+        passwords = [f'password{n}' for n in range(10)]
+        hashes = hasher.hash_many(passwords)
+        self.assertEqual(len(hashes), len(passwords))
+        for password, hashed in zip(passwords, hashes):
+            self.assertTrue(bcrypt.checkpw(password.encode(), hashed.encode()))
+
+    def test_hash_empty_password(self):
+        """Asegurando que se produce un error con una contraseña vacía."""
+        self.assertRaises(ValueError, hasher.hash, '')
+        self.assertRaises(ValueError, hasher.hash_many, ['ok', ''])
+
+    def test_hash_queue_full(self):
+        """Asegurando que se rechace el trabajo si la cola está llena."""
+        current_app.config.update(
+            BCRYPT_POOL_SIZE=1, BCRYPT_POOL_QUEUE_SIZE=0,
+            BCRYPT_POOL_TIMEOUT=0.01)
+        _, slots = hasher._get_executor(current_app.config)
+        slots.acquire()
+        try:
+            self.assertRaises(
+                HashingQueueFull, hasher.hash, 'greaterthaneight')
+            response = self.client.post(
+                '/users',
+                data=json.dumps({
+                    'username': 'sindy',
+                    'email': 'sindyepiquien@upeu.edu.pe',
+                    'password': 'greaterthaneight'
+                }),
+                content_type='application/json',
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '1')
+            self.assertIn('falló', data['status'])
+        finally:
+            slots.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
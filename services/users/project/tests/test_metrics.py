@@ -0,0 +1,68 @@
+# services/users/project/tests/test_metrics.py
+
+
+import re
+import unittest
+
+from project import metrics
+from project.api.metrics import Histogram
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user
+
+
+def sample(body, name, **labels):
+    """Devuelve el valor de una serie de la salida de Prometheus."""
+    label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(name + (f'{{{label_text}}}' if labels else '')) \
+        + r' ([0-9.e+-]+)$'
+    match = re.search(pattern, body, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+class TestHistogram(unittest.TestCase):
+    """Test para el histograma de latencias."""
+
+    def test_cumulative_buckets(self):
+        """Asegurando que los buckets sean acumulados."""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.cumulative()), [(0.1, 1), (1.0, 3)])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.total, 4.25)
+
+
+class TestMetrics(BaseTestCase):
+    """Test para las métricas del servicio."""
+
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+
+    def test_metrics(self):
+        """Asegurando que se registren latencias, estados y SQL por
+        endpoint."""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        self.client.get('/users')
+        self.client.get('/users')
+        self.client.get('/users/999')
+        response = self.client.get('/users/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/plain')
+        body = response.data.decode()
+        self.assertEqual(sample(
+            body, 'users_request_duration_seconds_count',
+            endpoint='users.get_all_users', method='GET'), 2)
+        self.assertEqual(sample(
+            body, 'users_requests_total', endpoint='users.get_single_user',
+            method='GET', status=404), 1)
+        self.assertGreaterEqual(sample(
+            body, 'users_db_statements_total',
+            endpoint='users.get_all_users'), 2)
+        self.assertIsNotNone(sample(
+            body, 'users_db_seconds_total', endpoint='users.get_all_users'))
+        self.assertEqual(sample(body, 'users_cache_misses_total'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
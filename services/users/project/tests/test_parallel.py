@@ -0,0 +1,35 @@
+# services/users/project/tests/test_parallel.py
+
+
+import os
+import tempfile
+import unittest
+
+from project.tests.parallel import split_modules, worker_database_url
+
+
+class TestParallel(unittest.TestCase):
+    """Test del ejecutor de tests en paralelo"""
+
+    def test_memory_database_is_shared(self):
+        """Asegurando que SQLite en memoria no cambia por worker"""
+        self.assertEqual(worker_database_url('sqlite://', 1), 'sqlite://')
+
+    def test_sqlite_file_per_worker(self):
+        """Asegurando que cada worker usa su propio archivo SQLite"""
+        self.assertEqual(
+            worker_database_url('sqlite:////tmp/users_test.db', 2),
+            'sqlite:////tmp/users_test_w2.db')
+
+    def test_split_modules(self):
+        """Asegurando que los módulos se reparten entre los workers"""
+        with tempfile.TemporaryDirectory() as directory:
+            modules = []
+            for name, size in (('a', 30), ('b', 20), ('c', 10)):
+                path = os.path.join(directory, f'{name}.py')
+                with open(path, 'w') as handle:
+                    handle.write('#' * size)
+                modules.append((path, name))
+            self.assertEqual(
+                split_modules(modules, 2), [['a'], ['b', 'c']])
+            self.assertEqual(split_modules(modules, 5), [['a'], ['b'], ['c']])
@@ -0,0 +1,111 @@
+# services/users/project/tests/test_replica.py
+
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from flask_testing import TestCase
+
+from project import create_app, db
+from project.api.models import User
+
+
+class ReplicaTestCase(TestCase):
+    """Aplicación con un primario y una réplica en archivos SQLite"""
+
+    replica_down = False
+
+    def create_app(self):
+        self.directory = tempfile.mkdtemp()
+        replica = os.path.join(self.directory, 'replica.db')
+        if self.replica_down:
+            replica = os.path.join(self.directory, 'missing', 'replica.db')
+        app = create_app()
+        app.config.from_object('project.config.TestingConfig')
+        app.config['SQLALCHEMY_DATABASE_URI'] = \
+            'sqlite:///' + os.path.join(self.directory, 'primary.db')
+        app.config['SQLALCHEMY_BINDS'] = {'replica': 'sqlite:///' + replica}
+        return app
+
+    def setUp(self):
+        binds = [None] if self.replica_down else [None, 'replica']
+        for bind in binds:
+            engine = db.get_engine(bind=bind)
+            db.Model.metadata.create_all(engine)
+            name = bind or 'primary'
+            engine.execute(User.__table__.insert().values(
+                username=name, email=f'{name}@upeu.edu.pe', password='x'))
+
+    def tearDown(self):
+        db.session.remove()
+        for bind in (None, 'replica'):
+            db.get_engine(bind=bind).dispose()
+        shutil.rmtree(self.directory)
+
+    def usernames(self):
+        response = self.client.get('/users')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data.decode())
+        return [user['username'] for user in data['data']['users']]
+
+
+class TestReadReplica(ReplicaTestCase):
+    """Test de las lecturas desde la réplica"""
+
+    def test_reads_use_replica(self):
+        """Asegurando que las lecturas usan la réplica"""
+        self.assertEqual(self.usernames(), ['replica'])
+        response = self.client.get('/users/1')
+        data = json.loads(response.data.decode())
+        self.assertEqual(data['data']['username'], 'replica')
+
+    def test_read_your_writes(self):
+        """Asegurando que quien escribe lee del primario por un tiempo"""
+        response = self.client.post(
+            '/users',
+            data=json.dumps({
+                'username': 'sindy',
+                'email': 'sindyepiquien@upeu.edu.pe',
+                'password': 'greaterthaneight'
+            }),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('db_primary_until', response.headers['Set-Cookie'])
+        self.assertEqual(self.usernames(), ['primary', 'sindy'])
+        self.client.cookie_jar.clear()
+        self.assertEqual(self.usernames(), ['replica'])
+
+    def test_replica_reads_not_cached(self):
+        """Asegurando que lo leído de la réplica no llega a la caché"""
+        response = self.client.get('/users/1')
+        data = json.loads(response.data.decode())
+        self.assertEqual(data['data']['username'], 'replica')
+        self.client.set_cookie(
+            'localhost', 'db_primary_until', str(time.time() + 60))
+        response = self.client.get('/users/1')
+        data = json.loads(response.data.decode())
+        self.assertEqual(data['data']['username'], 'primary')
+
+
+class TestReplicaDown(ReplicaTestCase):
+    """Test del paso al primario cuando la réplica no responde"""
+
+    replica_down = True
+
+    def test_failover_to_primary(self):
+        """Asegurando que se lee del primario si la réplica está caída"""
+        self.assertEqual(self.usernames(), ['primary'])
+        self.assertEqual(self.usernames(), ['primary'])
+        response = self.client.get('/users/pool/stats')
+        data = json.loads(response.data.decode())
+        self.assertTrue(data['data']['replica']['down'])
+        self.assertEqual(data['data']['replica']['failovers'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
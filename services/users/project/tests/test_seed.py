@@ -0,0 +1,61 @@
+# services/users/project/tests/test_seed.py
+
+
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import bcrypt
+
+from project import db
+from project.api.models import User
+from project.api.seed import SEED_PASSWORD, _copy_rows, seed_users
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user
+
+
+class TestSeedUsers(BaseTestCase):
+    """Test para la generación de usuarios sintéticos."""
+
+    def test_seed_users_chunks(self):
+        """Asegurando que se inserten usuarios únicos por lotes y se
+        reporte el progreso."""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        reports = []
+        seed_users(25, chunk_size=10, precomputed_hash=True,
+                   progress=lambda done, total: reports.append(done))
+        self.assertEqual(reports, [10, 20, 25])
+        seed_users(5, precomputed_hash=True)
+        self.assertEqual(User.query.count(), 31)
+        usernames = {username for username, in db.session.query(
+            User.username)}
+        self.assertEqual(len(usernames), 31)
+
+    def test_seed_users_hashes(self):
+        """Asegurando que sin hash precalculado cada usuario tenga su propio
+        hash válido."""
+        seed_users(3)
+        passwords = [password for password, in db.session.query(
+            User.password)]
+        self.assertEqual(len(set(passwords)), 3)
+        self.assertTrue(bcrypt.checkpw(
+            SEED_PASSWORD.encode(), passwords[0].encode()))
+
+    def test_copy_rows_uses_database_now(self):
+        """Asegurando que `COPY` usa la fecha dada (la de la base) y no la
+        del proceso."""
+        now = datetime(2020, 1, 2, 23, 59, 59)
+        connection = mock.Mock()
+        cursor = connection.connection.cursor.return_value
+        with mock.patch.object(db.session, 'connection',
+                               return_value=connection):
+            _copy_rows([{'username': 'a', 'email': 'a@example.com',
+                         'password': 'x'}], now)
+        buffer = cursor.copy_expert.call_args[0][1]
+        self.assertEqual(buffer.getvalue().strip(),
+                         f'a,a@example.com,x,t,{now.isoformat()}')
+        cursor.close.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
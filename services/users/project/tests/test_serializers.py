@@ -0,0 +1,36 @@
+# services/users/project/tests/test_serializers.py
+
+
+import json
+import unittest
+from unittest import mock
+
+from project.api import serializers
+from project.api.models import user_rows
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user
+
+
+class TestSerializers(BaseTestCase):
+    """Test para la serialización rápida de usuarios."""
+
+    def test_dumps_stdlib_fallback(self):
+        """Asegurando que sin orjson se use el codificador estándar."""
+        obj = {'users': [{'id': 1, 'username': 'sindy', 'active': True}]}
+        with mock.patch.object(serializers, 'orjson', None):
+            encoded = serializers.dumps(obj)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(json.loads(encoded.decode()), obj)
+        self.assertEqual(json.loads(serializers.dumps(obj).decode()), obj)
+
+    def test_user_rows_public_fields(self):
+        """Asegurando que las filas planas no incluyan la contraseña."""
+        user = add_user(
+            'sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        row = user_rows().one()
+        self.assertEqual(row._asdict(), user.to_json())
+        self.assertNotIn('password', row.keys())
+
+
+if __name__ == '__main__':
+    unittest.main()
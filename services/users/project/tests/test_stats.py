@@ -0,0 +1,107 @@
+# services/users/project/tests/test_stats.py
+
+
+import json
+import re
+import unittest
+from datetime import datetime
+
+from project import db
+from project.api.models import (
+    UserCounter, database_date, rebuild_user_stats
+)
+from project.api.seed import seed_users
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user, recorded_queries
+
+
+class TestUserStats(BaseTestCase):
+    """Test de los contadores de usuarios"""
+
+    def stats(self, query=''):
+        response = self.client.get(f'/users/stats?{query}')
+        return response, json.loads(response.data.decode())
+
+    def add_users(self):
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        self.client.post(
+            '/users',
+            data=json.dumps({
+                'username': 'raquel',
+                'email': 'raquel@gmail.com',
+                'password': 'greaterthaneight'
+            }),
+            content_type='application/json',
+        )
+        self.client.post(
+            '/users/bulk',
+            data=json.dumps([
+                {'username': f'bulk{number}',
+                 'email': f'bulk{number}@upeu.edu.pe',
+                 'password': 'greaterthaneight'}
+                for number in range(3)
+            ]),
+            content_type='application/json',
+        )
+
+    def test_stats_counts_writes(self):
+        """Asegurando que los contadores siguen cada forma de escribir"""
+        self.add_users()
+        seed_users(2, precomputed_hash=True)
+        response, data = self.stats()
+        today = datetime.utcnow().date().isoformat()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['data']['total'], 7)
+        self.assertEqual(data['data']['active'], 7)
+        self.assertEqual(data['data']['inactive'], 0)
+        self.assertEqual(
+            data['data']['signups'], [{'day': today, 'count': 7}])
+
+    def test_stats_active_updates(self):
+        """Asegurando que desactivar un usuario actualiza los contadores"""
+        user = add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'password')
+        add_user('raquel', 'raquel@gmail.com', 'password')
+        user.active = False
+        db.session.commit()
+        _, data = self.stats()
+        self.assertEqual(data['data']['active'], 1)
+        self.assertEqual(data['data']['inactive'], 1)
+        user.active = False
+        db.session.commit()
+        _, data = self.stats()
+        self.assertEqual(data['data']['active'], 1)
+
+    def test_stats_do_not_scan_users(self):
+        """Asegurando que leer las estadísticas no consulta `users`"""
+        self.add_users()
+        with recorded_queries() as statements:
+            self.stats()
+        self.assertFalse(any(
+            re.search(r'\busers\b', statement) for statement in statements))
+
+    def test_stats_etag_includes_date(self):
+        """Asegurando que el ETag cambia con la fecha de la base de datos,
+        no solo con las escrituras"""
+        response = self.client.get('/users/stats')
+        self.assertIn(database_date().isoformat(), response.headers['ETag'])
+
+    def test_rebuild_stats(self):
+        """Asegurando que los contadores se reconstruyen desde `users`"""
+        self.add_users()
+        _, expected = self.stats()
+        UserCounter.query.update({'value': 0})
+        db.session.commit()
+        self.assertEqual(rebuild_user_stats(), (5, 5))
+        _, data = self.stats()
+        self.assertEqual(data, expected)
+
+    def test_stats_invalid_days(self):
+        """Asegurando que se produce un error con `days` inválido"""
+        for query in ('days=0', 'days=a', 'days=1000'):
+            response, data = self.stats(query)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('falló', data['status'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,7 @@ import unittest
 from project.tests.base import BaseTestCase
 # from project import db
 # from project.api.models import User
-from project.tests.utils import add_user
+from project.tests.utils import add_user, recorded_queries
 
 
 # def add_user(username, email):
@@ -106,6 +106,192 @@ class TestUserService(BaseTestCase):
                 'Disculpa. El email ya existe.', data['message'])
             self.assertIn('falló', data['status'])
 
+    def test_add_user_duplicate_username(self):
+        """Asegurando que se produce un error si el nombre de usuario ya
+        existe."""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        with self.client:
+            response = self.client.post(
+                '/users',
+                data=json.dumps({
+                    'username': 'sindy',
+                    'email': 'sindy@gmail.com',
+                    'password': 'greaterthaneight'
+                }),
+                content_type='application/json',
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(
+                'Disculpa. El nombre de usuario ya existe.', data['message'])
+            self.assertIn('falló', data['status'])
+
+    def test_add_user_single_statement(self):
+        """Asegurando que agregar un usuario ejecute una única sentencia
+        sobre la tabla users y solo las sentencias de registro esperadas
+        (versión, cambios, contadores y altas)."""
+        with self.client:
+            with recorded_queries() as statements:
+                response = self.client.post(
+                    '/users',
+                    data=json.dumps({
+                        'username': 'sindy',
+                        'email': 'sindyepiquien@upeu.edu.pe',
+                        'password': 'greaterthaneight'
+                    }),
+                    content_type='application/json',
+                )
+            self.assertEqual(response.status_code, 201)
+            # los SAVEPOINT son de la transacción del test
+            statements = [
+                statement for statement in statements
+                if 'SAVEPOINT' not in statement
+            ]
+            self.assertEqual(len(statements), 5)
+            users_statements = [
+                statement for statement in statements
+                if ' users' in statement
+            ]
+            self.assertEqual(len(users_statements), 1)
+            self.assertTrue(users_statements[0].startswith('INSERT'))
+
+    def test_add_users_bulk(self):
+        """Asegurando que se puedan agregar varios usuarios en una petición
+        y se reporte el resultado de cada uno."""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        with self.client:
+            response = self.client.post(
+                '/users/bulk',
+                data=json.dumps([
+                    {'username': 'raquel', 'email': 'raquel@gmail.com',
+                     'password': 'greaterthaneight'},
+                    {'username': 'juan', 'email': 'juan@gmail.com',
+                     'password': 'greaterthaneight'},
+                    {'username': 'sindy2',
+                     'email': 'sindyepiquien@upeu.edu.pe',
+                     'password': 'greaterthaneight'},
+                    {'username': 'juan', 'email': 'juan2@gmail.com',
+                     'password': 'greaterthaneight'},
+                    {'username': 'pedro', 'email': 'pedro@gmail.com'},
+                ]),
+                content_type='application/json',
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('success', data['status'])
+            self.assertEqual(data['data']['created'], 2)
+            self.assertEqual(data['data']['failed'], 3)
+            results = data['data']['results']
+            self.assertIn('raquel@gmail.com ha sido agregado!',
+                          results[0]['message'])
+            self.assertIn('success', results[1]['status'])
+            self.assertIn('Disculpa. El email ya existe.',
+                          results[2]['message'])
+            self.assertIn('Disculpa. El nombre de usuario ya existe.',
+                          results[3]['message'])
+            self.assertIn('Carga inválida.', results[4]['message'])
+            response = self.client.get('/users')
+            data = json.loads(response.data.decode())
+            self.assertEqual(len(data['data']['users']), 3)
+
+    def test_add_users_bulk_invalid_json(self):
+        """Asegurando que se produce un error si la carga no es una lista."""
+        with self.client:
+            for payload in ({}, [], {'username': 'sindy'}):
+                response = self.client.post(
+                    '/users/bulk',
+                    data=json.dumps(payload),
+                    content_type='application/json',
+                )
+                data = json.loads(response.data.decode())
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Carga inválida.', data['message'])
+                self.assertIn('falló', data['status'])
+
+    def test_add_users_bulk_too_large(self):
+        """Asegurando que se rechaza un lote mayor que el máximo."""
+        size = self.app.config['USERS_BULK_MAX_SIZE'] + 1
+        response = self.client.post(
+            '/users/bulk',
+            data=json.dumps([{}] * size),
+            content_type='application/json',
+        )
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Carga inválida.', data['message'])
+
+    def patch_users(self, payload):
+        response = self.client.patch(
+            '/users',
+            data=json.dumps(payload),
+            content_type='application/json',
+        )
+        return response, json.loads(response.data.decode())
+
+    def test_update_users_active_by_ids(self):
+        """Asegurando que PATCH desactiva usuarios por id con un UPDATE por
+        bloque e invalida la caché."""
+        self.app.config['USERS_BULK_CHUNK_SIZE'] = 2
+        users = [
+            add_user(f'user{number}', f'user{number}@upeu.edu.pe', 'x')
+            for number in range(3)
+        ]
+        ids = [user.id for user in users]
+        self.client.get(f'/users/{ids[0]}')
+        with recorded_queries() as statements:
+            response, data = self.patch_users(
+                {'active': False, 'ids': ids + [999]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['data']['updated'], 3)
+        updates = [
+            statement for statement in statements
+            if statement.startswith('UPDATE users')
+        ]
+        self.assertEqual(len(updates), 2)
+        response = self.client.get(f'/users/{ids[0]}')
+        self.assertFalse(json.loads(response.data.decode())['data']['active'])
+        _, data = self.patch_users({'active': False, 'ids': ids})
+        self.assertEqual(data['data']['updated'], 0)
+        response = self.client.get('/users/stats')
+        self.assertEqual(
+            json.loads(response.data.decode())['data']['inactive'], 3)
+
+    def test_update_users_active_by_filter(self):
+        """Asegurando que PATCH actualiza los usuarios que cumplen el
+        filtro."""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        add_user('raquel', 'raquel@gmail.com', 'greaterthaneight')
+        _, data = self.patch_users(
+            {'active': False, 'filter': {'email_domain': 'UPEU.edu.pe'}})
+        self.assertEqual(data['data']['updated'], 1)
+        _, data = self.patch_users({
+            'active': False,
+            'filter': {'created_after': '2000-01-01',
+                       'created_before': '2000-12-31'}
+        })
+        self.assertEqual(data['data']['updated'], 0)
+        response = self.client.get('/users')
+        users = json.loads(response.data.decode())['data']['users']
+        self.assertEqual(
+            {user['username']: user['active'] for user in users},
+            {'sindy': False, 'raquel': True})
+
+    def test_update_users_active_invalid(self):
+        """Asegurando que se produce un error con una carga inválida"""
+        for payload in ({}, {'ids': [1]}, {'active': 'no', 'ids': [1]},
+                        {'active': False},
+                        {'active': False, 'ids': [1], 'filter': {}},
+                        {'active': False, 'ids': []},
+                        {'active': False, 'ids': ['1']},
+                        {'active': False, 'ids': [2 ** 40]},
+                        {'active': False, 'filter': {}},
+                        {'active': False, 'filter': {'name': 'x'}},
+                        {'active': False, 'filter': {'created_after': 'x'}},
+                        {'active': False, 'filter': {'email_domain': '@'}}):
+            response, data = self.patch_users(payload)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Carga inválida.', data['message'])
+
     def test_single_user(self):
         """Asegurando que un usuario único se comporte correctamente."""
         user = add_user(
@@ -130,11 +316,12 @@ class TestUserService(BaseTestCase):
     def test_single_user_incorrect_id(self):
         """Asegurando que se produce un error si el id no existe."""
         with self.client:
-            response = self.client.get('/users/999')
-            data = json.loads(response.data.decode())
-            self.assertEqual(response.status_code, 404)
-            self.assertIn('Usuario no existe', data['message'])
-            self.assertIn('falló', data['status'])
+            for user_id in ('999', '99999999999999999999999'):
+                response = self.client.get(f'/users/{user_id}')
+                data = json.loads(response.data.decode())
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('Usuario no existe', data['message'])
+                self.assertIn('falló', data['status'])
 
     def test_all_users(self):
         """Asegurando se obtenga a todos lus usuarios correctamente."""
@@ -153,6 +340,203 @@ class TestUserService(BaseTestCase):
                 'raquel@gmail.com', data['data']['users'][1]['email'])
             self.assertIn('success', data['status'])
 
+    def test_all_users_paginated(self):
+        """Asegurando que la paginación por cursor recorra todos los
+        usuarios sin repetirlos."""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        add_user('raquel', 'raquel@gmail.com', 'greaterthaneight')
+        add_user('juan', 'juan@gmail.com', 'greaterthaneight')
+        with self.client:
+            response = self.client.get('/users?limit=2')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(data['data']['users']), 2)
+            self.assertIn('sindy', data['data']['users'][0]['username'])
+            self.assertIn('raquel', data['data']['users'][1]['username'])
+            self.assertIsNotNone(data['data']['next'])
+            response = self.client.get(
+                f'/users?limit=2&after={data["data"]["next"]}')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(data['data']['users']), 1)
+            self.assertIn('juan', data['data']['users'][0]['username'])
+            self.assertIsNone(data['data']['next'])
+
+    def test_all_users_invalid_pagination(self):
+        """Asegurando que se produce un error con parámetros de paginación
+        inválidos."""
+        with self.client:
+            for query in ('limit=0', 'limit=blah', 'after=-1',
+                          'after=99999999999999999999999'):
+                response = self.client.get(f'/users?{query}')
+                data = json.loads(response.data.decode())
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('paginación inválidos', data['message'])
+                self.assertIn('falló', data['status'])
+
+    def test_users_by_ids(self):
+        """Asegurando que `ids` devuelve los usuarios en el orden pedido con
+        una sola consulta y reporta los que no existen."""
+        first = add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'password')
+        second = add_user('raquel', 'raquel@gmail.com', 'password')
+        url = f'/users?ids={second.id},999,{first.id},{second.id}'
+        expected = second.to_json()
+        with recorded_queries() as queries:
+            response = self.client.get(url)
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [user['username'] for user in data['data']['users']],
+            ['raquel', 'sindy'])
+        self.assertEqual(data['data']['users'][0], expected)
+        self.assertEqual(data['data']['missing'], [999])
+        self.assertEqual(
+            sum('FROM users' in query for query in queries), 1)
+
+    def test_users_by_ids_invalid(self):
+        """Asegurando que se produce un error con ids inválidos o
+        demasiados ids."""
+        self.app.config['USERS_BATCH_MAX_SIZE'] = 2
+        for query, message in (('ids=', 'inválida'), ('ids=1,a', 'inválida'),
+                               ('ids=99999999999999999999999', 'inválida'),
+                               ('ids=1,2,3', 'como máximo 2')):
+            response = self.client.get(f'/users?{query}')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(message, data['message'])
+            self.assertIn('falló', data['status'])
+
+    def test_export_users_ndjson(self):
+        """Asegurando que la exportación NDJSON devuelva una línea por
+        usuario."""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        add_user('raquel', 'raquel@gmail.com', 'greaterthaneight')
+        response = self.client.get('/users/export')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.data.decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])['username'], 'sindy')
+        self.assertEqual(json.loads(lines[1])['email'], 'raquel@gmail.com')
+        self.assertNotIn('password', json.loads(lines[0]))
+
+    def test_export_users_csv(self):
+        """Asegurando que la exportación CSV incluya la cabecera y las
+        filas."""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        response = self.client.get('/users/export?format=csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+        lines = response.data.decode().splitlines()
+        self.assertEqual(lines[0], 'id,username,email,active')
+        self.assertIn('sindy,sindyepiquien@upeu.edu.pe,True', lines[1])
+
+    def test_export_users_csv_empty(self):
+        """Asegurando que la exportación CSV sin usuarios envíe la
+        cabecera."""
+        response = self.client.get('/users/export?format=csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data.decode().splitlines(), ['id,username,email,active'])
+
+    def test_export_users_invalid_format(self):
+        """Asegurando que se produce un error con un formato desconocido."""
+        with self.client:
+            response = self.client.get('/users/export?format=xml')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Formato de exportación inválido.', data['message'])
+            self.assertIn('falló', data['status'])
+
+    def test_all_users_etag(self):
+        """Asegurando que se responda 304 mientras la colección no cambie."""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        with self.client:
+            response = self.client.get('/users')
+            etag = response.headers['ETag']
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get(
+                '/users', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.data, b'')
+            self.assertEqual(response.headers['ETag'], etag)
+            add_user('raquel', 'raquel@gmail.com', 'greaterthaneight')
+            response = self.client.get(
+                '/users', headers={'If-None-Match': etag})
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers['ETag'], etag)
+            self.assertEqual(len(data['data']['users']), 2)
+
+    def test_single_user_etag(self):
+        """Asegurando que el ETag de un usuario cambie con las escrituras y
+        dependa de la URL."""
+        user = add_user(
+            'sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        with self.client:
+            response = self.client.get(f'/users/{user.id}')
+            etag = response.headers['ETag']
+            self.assertNotEqual(
+                self.client.get('/users').headers['ETag'], etag)
+            response = self.client.get(
+                f'/users/{user.id}', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.client.post(
+                '/users',
+                data=json.dumps({
+                    'username': 'raquel',
+                    'email': 'raquel@gmail.com',
+                    'password': 'greaterthaneight'
+                }),
+                content_type='application/json',
+            )
+            response = self.client.get(
+                f'/users/{user.id}', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get('/users/999')
+            self.assertEqual(response.status_code, 404)
+            self.assertNotIn('ETag', response.headers)
+
+    def test_search_users(self):
+        """Asegurando que la búsqueda por prefijo y subcadena no distinga
+        mayúsculas."""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        add_user('Raquel', 'raquel@gmail.com', 'greaterthaneight')
+        add_user('sin_dy', 'otro@upeu.edu.pe', 'greaterthaneight')
+        with self.client:
+            response = self.client.get('/users/search?q=SIN')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                [user['username'] for user in data['data']['users']],
+                ['sindy', 'sin_dy'])
+            response = self.client.get('/users/search?q=sin_')
+            data = json.loads(response.data.decode())
+            self.assertEqual(
+                [user['username'] for user in data['data']['users']],
+                ['sin_dy'])
+            response = self.client.get('/users/search?q=upeu&match=contains')
+            data = json.loads(response.data.decode())
+            self.assertEqual(len(data['data']['users']), 2)
+            response = self.client.get('/users/search?q=quel')
+            data = json.loads(response.data.decode())
+            self.assertEqual(data['data']['users'], [])
+            response = self.client.get(
+                '/users/search?q=quel&match=contains&limit=1')
+            data = json.loads(response.data.decode())
+            self.assertIn('Raquel', data['data']['users'][0]['username'])
+
+    def test_search_users_invalid(self):
+        """Asegurando que se produce un error con una búsqueda inválida."""
+        with self.client:
+            for query in ('', 'q=', 'q=ab&match=contains', 'q=a&limit=0',
+                          'q=a&match=regex', 'q=a&limit=blah'):
+                response = self.client.get(f'/users/search?{query}')
+                data = json.loads(response.data.decode())
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('búsqueda inválidos', data['message'])
+                self.assertIn('falló', data['status'])
+
     def test_main_no_users(self):
         """Asegurando que la ruta principal funcione correctamente cuando no
         hay usuarios añadidos a la base de datos."""
@@ -166,32 +550,67 @@ class TestUserService(BaseTestCase):
         usuario es correctamente agregado a la base de datos."""
         add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
         add_user('raquel', 'raquel@gmail.com', 'greaterthaneight')
-        with self.client:
-            response = self.client.get('/')
-            self.assertEqual(response.status_code, 200)
-            self.assertIn(b'Todos los usuarios', response.data)
-            self.assertNotIn(b'<p>No hay usuarios!</p>', response.data)
-            self.assertIn(b'sindy', response.data)
-            self.assertIn(b'raquel', response.data)
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Todos los usuarios', response.data)
+        self.assertNotIn(b'<p>No hay usuarios!</p>', response.data)
+        self.assertIn(b'sindy', response.data)
+        self.assertIn(b'raquel', response.data)
 
     def test_main_add_user(self):
         """
         Asegurando que un nuevo usuarios pueda ser agregado a la db mediante
         un POST request.
         """
-        with self.client:
-            response = self.client.post(
-                '/',
-                data=dict(
-                    username='sindy',
-                    email='sindyepiquien@upeu.edu.pe',
-                    password='greaterthaneight'),
-                follow_redirects=True
-            )
-            self.assertEqual(response.status_code, 200)
-            self.assertIn(b'Todos los usuarios', response.data)
-            self.assertNotIn(b'<p>No hay usuarios!</p>', response.data)
-            self.assertIn(b'sindy', response.data)
+        response = self.client.post(
+            '/',
+            data=dict(
+                username='sindy',
+                email='sindyepiquien@upeu.edu.pe',
+                password='greaterthaneight'),
+            follow_redirects=True
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Todos los usuarios', response.data)
+        self.assertNotIn(b'<p>No hay usuarios!</p>', response.data)
+        self.assertIn(b'sindy', response.data)
+
+    def test_main_pagination(self):
+        """Asegurando que la ruta principal pagina la lista de usuarios"""
+        self.app.config['USERS_INDEX_PAGE_SIZE'] = 2
+        for name in ('ana', 'beto', 'carla'):
+            add_user(name, f'{name}@upeu.edu.pe', 'greaterthaneight')
+        response = self.client.get('/')
+        self.assertIn(b'beto', response.data)
+        self.assertNotIn(b'carla', response.data)
+        self.assertIn(b'?page=2', response.data)
+        response = self.client.get('/?page=2')
+        self.assertIn(b'<ol start="3">', response.data)
+        self.assertIn(b'carla', response.data)
+        self.assertNotIn(b'beto', response.data)
+        self.assertIn(b'?page=1', response.data)
+        self.assertNotIn(b'?page=3', response.data)
+
+    def test_main_page_invalid_page(self):
+        """Asegurando que una página inválida o fuera de rango devuelve 400
+        antes de empezar la respuesta."""
+        for page in ('99999999999999999999', 'a'):
+            response = self.client.get(f'/?page={page}')
+            self.assertEqual(response.status_code, 400)
+
+    def test_main_page_cache_invalidated(self):
+        """Asegurando que el POST del formulario invalida la página cacheada"""
+        add_user('sindy', 'sindyepiquien@upeu.edu.pe', 'greaterthaneight')
+        with recorded_queries() as queries:
+            self.client.get('/').data
+            self.client.get('/').data
+        self.assertEqual(
+            sum('FROM users' in query for query in queries), 1)
+        response = self.client.post('/', data=dict(
+            username='raquel', email='raquel@gmail.com',
+            password='greaterthaneight'))
+        self.assertIn(b'sindy', response.data)
+        self.assertIn(b'raquel', response.data)
 
 
 if __name__ == '__main__':
@@ -1,3 +1,7 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
 from project import db
 from project.api.models import User
 
@@ -7,3 +11,19 @@ def add_user(username, email, password):
     db.session.add(user)
     db.session.commit()
     return user
+
+
+@contextmanager
+def recorded_queries():
+    """Registra las sentencias SQL ejecutadas dentro del bloque."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_engine()
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
@@ -0,0 +1,9 @@
+# services/users/wsgi.py
+"""Punto de entrada WSGI de producción: gunicorn wsgi:app
+
+A diferencia de manage.py no inicia coverage ni carga la CLI.
+"""
+
+from project import create_app
+
+app = create_app()